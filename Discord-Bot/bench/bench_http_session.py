@@ -0,0 +1,89 @@
+"""
+Benchmark: ส่งออเดอร์ 500 รายการไปยัง stub API เทียบ 2 แบบ
+  - before: เปิด aiohttp.ClientSession ใหม่ทุกออเดอร์ (แบบเดิมของ OrderCog)
+  - after : ใช้ session เดียวร่วมกัน (create_http_session ของ OrderCog)
+
+วิธีรัน (จากโฟลเดอร์ Discord-Bot):
+    python -m bench.bench_http_session --orders 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from bench.stub_api import StubAPI
+from cogs.order import create_http_session
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def order_payload(i: int) -> dict:
+    return {"student_id": 68070000 + i, "store_id": 1, "product_id": 1}
+
+
+async def post_order(session: aiohttp.ClientSession, url: str, payload: dict):
+    async with session.post(url, json=payload) as response:
+        await response.json()
+
+
+async def run(mode: str, api: StubAPI, orders: int, concurrency: int):
+    url = f"{api.base_url}/orders/add"
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    shared = create_http_session() if mode == "after" else None
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            if shared is None:
+                async with aiohttp.ClientSession() as session:
+                    await post_order(session, url, order_payload(i))
+            else:
+                await post_order(shared, url, order_payload(i))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    requests_before = api.requests
+    connections_before = api.connections
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(orders)))
+    finally:
+        if shared is not None:
+            await shared.close()
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{mode:<6} | orders={orders} "
+        f"p50={percentile(latencies, 50):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"mean={statistics.fmean(latencies):7.2f}ms "
+        f"total={elapsed:6.2f}s "
+        f"requests={api.requests - requests_before} "
+        f"tcp_connections={api.connections - connections_before}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="หน่วงเวลาของ stub ต่อ request (วินาที)")
+    args = parser.parse_args()
+
+    api = StubAPI(latency=args.latency)
+    await api.start()
+    try:
+        for mode in ("before", "after"):
+            await run(mode, api, args.orders, args.concurrency)
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
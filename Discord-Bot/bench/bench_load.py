@@ -0,0 +1,281 @@
+"""
+Load test แบบ offline ของ cog ในบอท (OrderCog + Login) กับ stub ของ Go API
+
+จำลองช่วงพักเที่ยง:
+  1. เปิดทิกเก็ตพร้อมกัน N ช่อง (ข้อความจาก Ticket Tool -> OrderCog.on_message)
+  2. ทุกช่องพิมพ์ !menu พร้อมกัน
+  3. สั่ง !order รวม M ครั้ง กระจายทุกช่อง (พร้อมกันสูงสุด --concurrency)
+     แล้วคนเดียวกด !order เมนูเดิมซ้ำ --spam ครั้ง (ต้องถูกกันกดซ้ำ/จำกัดความถี่)
+  4. !order ระหว่าง backend ขัดข้องชั่วคราว (--inject-failures: ตอบ 503 และตัด connection หลังสร้างออเดอร์)
+     ทุกจานต้องถึงร้านครั้งเดียว (ลองใหม่ด้วย Idempotency-Key เดิม) และข้อความสถานะต้องแจ้งว่ากำลังลองใหม่
+  5. /verify พร้อมกัน V ครั้ง
+
+รายงานต่อขั้น: throughput, latency p50/p95/p99, จำนวนครั้งที่เรียก backend และ Discord ต่อคำสั่ง
+และหน่วยความจำสูงสุด (tracemalloc)
+
+วิธีรัน (จากโฟลเดอร์ Discord-Bot):
+    python -m bench.bench_load --tickets 200 --orders 2000
+    python -m bench.bench_load --fail-p99 250   # exit 1 ถ้าคำสั่งไหน p99 เกิน 250ms
+(exit 1 เสมอถ้าการลองส่งซ้ำในขั้นที่ 4 ได้ออเดอร์ซ้ำ/ไม่ครบ)
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import discord
+
+import cogs.Login_handler as login_module
+import cogs.order as order_module
+from bench.fakes import (
+    DiscordCalls,
+    FakeBot,
+    FakeChannel,
+    FakeContext,
+    FakeGuild,
+    FakeInteraction,
+    FakeMember,
+    FakeMessage,
+    FakeRole,
+    FakeUser,
+)
+from bench.stub_api import STUB_PRODUCTS, STUB_STORES, StubAPI
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Phase:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.elapsed = 0.0
+        self.backend_calls = 0
+        self.discord_calls = 0
+        self.peak_memory = 0
+
+    async def timed(self, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            self.errors += 1
+            print(f"  ! {self.name}: {type(e).__name__}: {e}", file=sys.stderr)
+        self.latencies.append((time.perf_counter() - start) * 1000)
+
+    def report(self) -> str:
+        count = len(self.latencies) or 1
+        return (
+            f"{self.name:<14} n={len(self.latencies):<5} "
+            f"{len(self.latencies) / self.elapsed if self.elapsed else 0:8.1f} cmd/s  "
+            f"p50={percentile(self.latencies, 50):7.2f}ms "
+            f"p95={percentile(self.latencies, 95):7.2f}ms "
+            f"p99={percentile(self.latencies, 99):7.2f}ms  "
+            f"backend/cmd={self.backend_calls / count:5.2f} "
+            f"discord/cmd={self.discord_calls / count:5.2f} "
+            f"errors={self.errors} "
+            f"peak_mem={self.peak_memory / 1024 / 1024:6.2f}MiB"
+        )
+
+
+async def run_phase(name: str, api: StubAPI, calls: DiscordCalls, jobs, concurrency: int) -> Phase:
+    phase = Phase(name)
+    semaphore = asyncio.Semaphore(concurrency)
+    requests_before = api.requests
+    calls_before = calls.count
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    async def one(job):
+        async with semaphore:
+            await phase.timed(job())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(job) for job in jobs))
+    phase.elapsed = time.perf_counter() - started
+    phase.backend_calls = api.requests - requests_before
+    phase.discord_calls = calls.count - calls_before
+    if tracemalloc.is_tracing():
+        phase.peak_memory = tracemalloc.get_traced_memory()[1]
+    return phase
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=200, help="จำนวนทิกเก็ตที่เปิดพร้อมกัน")
+    parser.add_argument("--orders", type=int, default=2000, help="จำนวน !order ทั้งหมด")
+    parser.add_argument("--spam", type=int, default=20, help="จำนวน !order ซ้ำ ๆ จากคนเดียวในช่องเดียว")
+    parser.add_argument("--retry-orders", type=int, default=20, help="จำนวน !order (x2) ระหว่าง backend ขัดข้อง")
+    parser.add_argument("--inject-failures", type=int, default=2,
+                        help="จำนวน 503 และจำนวน connection ที่ตัดทิ้ง (อย่างละเท่านี้) ในขั้น !order retry")
+    parser.add_argument("--verifies", type=int, default=200, help="จำนวน /verify ทั้งหมด")
+    parser.add_argument("--concurrency", type=int, default=200, help="จำนวนคำสั่งที่ทำงานพร้อมกันสูงสุด")
+    parser.add_argument("--api-latency", type=float, default=0.005, help="(วินาที) หน่วงของ stub API ต่อ request")
+    parser.add_argument("--discord-latency", type=float, default=0.0, help="(วินาที) หน่วงของการเรียก Discord ปลอม")
+    parser.add_argument("--no-memory", action="store_true", help="ไม่วัดหน่วยความจำ (tracemalloc ทำให้ช้าลง)")
+    parser.add_argument("--fail-p99", type=float, default=None, help="(ms) exit 1 ถ้าขั้นใดมี p99 เกินค่านี้")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if not args.no_memory:
+        tracemalloc.start()
+
+    api = StubAPI(latency=args.api_latency)
+    await api.start()
+    calls = DiscordCalls(latency=args.discord_latency)
+    state_dir = tempfile.TemporaryDirectory()
+
+    # ชี้ cog ไปที่ stub และเก็บ state ไว้ในโฟลเดอร์ชั่วคราว
+    order_module.BASE_API_URL = api.base_url
+    ticket_tool = FakeUser("Ticket Tool", bot=True)
+    order_module.TICKET_TOOL_BOT_IDS = frozenset({ticket_tool.id})
+    order_module.CHANNEL_STATE_DB = f"{state_dir.name}/channel_states.sqlite"
+    login_module.ROSTER_DB = f"{state_dir.name}/roster.sqlite"
+
+    bot = FakeBot()
+    cog = order_module.OrderCog(bot)
+    login = login_module.Login(bot)
+    await cog.cog_load()
+    await login.cog_load()
+
+    guild = FakeGuild([FakeRole(login_module.VERIFIED_ROLE_ID)])
+    ticket_embed = discord.Embed(title="Ticket")
+    channels = []
+    customers = []
+    for i in range(args.tickets):
+        channel = FakeChannel(calls, f"{order_module.TICKET_CHANNEL_PREFIX}{i:04d}", guild)
+        bot.channels[channel.id] = channel
+        channels.append(channel)
+        customers.append(FakeUser(f"customer-{i}"))
+
+    started = time.perf_counter()
+    bot.set_ready()
+    await cog.warmed_up.wait()
+    print(f"warm-up: {(time.perf_counter() - started) * 1000:.1f}ms, backend calls={api.requests}")
+
+    phases = []
+    try:
+        phases.append(await run_phase("ticket-open", api, calls, [
+            (lambda ch=ch: cog.on_message(FakeMessage(calls, ch, ticket_tool, "", [ticket_embed])))
+            for ch in channels
+        ], args.concurrency))
+
+        store_names = [store["name"] for store in STUB_STORES]
+        picked = {}
+        menu_jobs = []
+        for ch, customer in zip(channels, customers):
+            picked[ch.id] = random.choice(STUB_STORES)["store_id"]
+            name = next(s["name"] for s in STUB_STORES if s["store_id"] == picked[ch.id])
+            ctx = FakeContext(calls, ch, customer, f"!menu {name}")
+            menu_jobs.append(lambda ctx=ctx, name=name: cog.menu_cmd.callback(cog, ctx, store_name=name))
+        phases.append(await run_phase("!menu", api, calls, menu_jobs, args.concurrency))
+
+        order_jobs = []
+        for i in range(args.orders):
+            index = i % len(channels)
+            # ทิกเก็ตละหลายคน (สั่งรวมกลุ่ม) คนละ 1 คำสั่ง: ไม่ติด token bucket/กันกดซ้ำต่อคน
+            ch, customer = channels[index], FakeUser(f"customer-{index}-{i // len(channels)}")
+            product = random.choice(STUB_PRODUCTS[picked[ch.id]])
+            text = product["name"] if i % 4 else f"{product['name']} x2, {product['name']} (ไม่เผ็ด)"
+            ctx = FakeContext(calls, ch, customer, f"!order {text}")
+            order_jobs.append(lambda ctx=ctx, text=text: cog.order_cmd.callback(cog, ctx, order_string=text))
+        orders_before = len(api.orders)
+        phases.append(await run_phase("!order", api, calls, order_jobs, args.concurrency))
+        dishes_expected = sum(3 if i % 4 == 0 else 1 for i in range(args.orders))
+        dishes_placed = len(api.orders) - orders_before
+
+        # คนเดียวกดสั่งเมนูเดิมรัว ๆ ในช่องเดียว: ควรส่งถึง backend แค่ครั้งเดียว
+        spammer = FakeUser("spammer")
+        product = STUB_PRODUCTS[picked[channels[0].id]][0]
+        spam_jobs = [
+            (lambda ctx=FakeContext(calls, channels[0], spammer, f"!order {product['name']}"):
+                cog.order_cmd.callback(cog, ctx, order_string=product["name"]))
+            for _ in range(args.spam)
+        ]
+        spam_before = len(api.orders)
+        phases.append(await run_phase("!order spam", api, calls, spam_jobs, args.concurrency))
+        spam_placed = len(api.orders) - spam_before
+
+        # backend ขัดข้องชั่วคราว: จานแรก ๆ ได้ 503 หรือ connection หลุดหลังร้านได้ออเดอร์ไปแล้ว
+        # (รวมกันไม่ถึง BREAKER_FAILURE_THRESHOLD ที่ค่าเริ่มต้น จึงไม่ต้องรอ circuit เปิด/ปิด)
+        retry_jobs = []
+        for i in range(args.retry_orders):
+            ch = channels[i % len(channels)]
+            product = STUB_PRODUCTS[picked[ch.id]][0]
+            text = f"{product['name']} x2"
+            ctx = FakeContext(calls, ch, FakeUser(f"retry-customer-{i}"), f"!order {text}")
+            retry_jobs.append(lambda ctx=ctx, text=text: cog.order_cmd.callback(cog, ctx, order_string=text))
+        sent_before = {ch.id: len(ch.sent) for ch in channels}
+        retry_before, replays_before, queue_retries_before = len(api.orders), api.replays, cog.order_queue.retries
+        api.fail_orders = api.drop_orders = args.inject_failures
+        phases.append(await run_phase("!order retry", api, calls, retry_jobs, args.concurrency))
+        retry_expected = 2 * args.retry_orders
+        retry_placed = len(api.orders) - retry_before
+        retry_replays = api.replays - replays_before
+        queue_retries = cog.order_queue.retries - queue_retries_before
+        retry_notices = sum(
+            any(content and "ลองใหม่" in content for content in message.edits)
+            for ch in channels for message in ch.sent[sent_before[ch.id]:]
+        )
+
+        with open(login_module.ROSTER_CSV, encoding="utf-8-sig") as f:
+            student_ids = [line.split(",")[0] for line in f.read().splitlines()[1:] if line]
+        verify_jobs = []
+        for i in range(args.verifies):
+            member = FakeMember(calls, guild, f"student-{i}")
+            interaction = FakeInteraction(calls, guild, member)
+            student_id = student_ids[i % len(student_ids)]
+            verify_jobs.append(
+                lambda interaction=interaction, student_id=student_id:
+                    login.verifyCommand.callback(login, interaction, student_id)
+            )
+        phases.append(await run_phase("/verify", api, calls, verify_jobs, args.concurrency))
+    finally:
+        await cog.cog_unload()
+        await login.cog_unload()
+        await api.stop()
+        state_dir.cleanup()
+
+    print(f"\nstores={len(store_names)} tickets={args.tickets} api_latency={args.api_latency * 1000:.1f}ms")
+    for phase in phases:
+        print(phase.report())
+    if len(phases) >= 3:
+        print(f"orders placed: {dishes_placed}/{dishes_expected} dishes (ส่วนที่ขาดคือถูกปฏิเสธเพราะคิวเต็ม/ล้มเหลว)")
+        print(f"spam: {args.spam} identical !order from one user -> {spam_placed} dish(es) sent to backend")
+    if len(phases) >= 5:
+        print(
+            f"retry: {retry_placed}/{retry_expected} dishes placed, {queue_retries} retries, "
+            f"{retry_replays} idempotent replay(s), {retry_notices} status message(s) showed a retry"
+        )
+        problems = []
+        if retry_placed != retry_expected:
+            problems.append(f"ได้ออเดอร์ {retry_placed} จาก {retry_expected} จาน (ต้องได้จานละ 1 ออเดอร์พอดี)")
+        if retry_replays != args.inject_failures:
+            problems.append(f"replay {retry_replays} ครั้ง (connection ที่ตัดทิ้ง {args.inject_failures} ครั้งต้อง replay ทุกครั้ง)")
+        if args.inject_failures and queue_retries < 2 * args.inject_failures:
+            problems.append(f"ลองใหม่แค่ {queue_retries} ครั้ง (ต้องอย่างน้อย {2 * args.inject_failures})")
+        if args.inject_failures and not retry_notices:
+            problems.append("ไม่มีข้อความสถานะไหนแจ้งว่ากำลังลองใหม่")
+        if problems:
+            print("\n❌ ลองส่งซ้ำผิดพลาด: " + "; ".join(problems))
+            sys.exit(1)
+
+    if args.fail_p99 is not None:
+        slow = [phase.name for phase in phases if percentile(phase.latencies, 99) > args.fail_p99]
+        if slow:
+            print(f"\n❌ p99 เกิน {args.fail_p99}ms: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,263 @@
+"""
+Benchmark ค่าใช้จ่ายต่อข้อความในเซิร์ฟเวอร์ (offline, ไม่ต่อ Discord จริง)
+
+ป้อน MESSAGE_CREATE ปลอมเข้า ConnectionState ของ discord.py โดยตรง (parse -> dispatch -> on_message
+ของทุก cog -> process_commands) แล้วเทียบ 2 แบบ:
+  legacy   intents เดิม (default + members + message_content), cache ข้อความ 1000 ข้อความ,
+           cache สมาชิกทั้งเซิร์ฟเวอร์ (chunk ตอนเริ่ม) และ on_message แบบเดิมที่เทียบชื่อบอท
+  trimmed  intents เท่าที่ใช้, ไม่ cache สมาชิก/ข้อความ, on_message ของ OrderCog ปัจจุบัน
+
+intents เดิมมี guild_typing ด้วย: Discord ส่ง TYPING_START มาก่อนแทบทุกข้อความที่คนพิม
+แบบ legacy จึงป้อน TYPING_START หนึ่งครั้งต่อข้อความของคน (แบบ trimmed ไม่ได้รับ event นี้เลย)
+ส่วน presence/member update ที่ได้จาก intents เดิมไม่ได้จำลอง ตัวเลขฝั่ง legacy จึงเป็นค่าต่ำสุด
+
+รายงาน CPU ต่อ 1000 ข้อความ และหน่วยความจำที่ค้างอยู่หลังจบ (tracemalloc หลัง gc)
+
+วิธีรัน (จากโฟลเดอร์ Discord-Bot):
+    python -m bench.bench_on_message --messages 20000 --members 3000
+"""
+import argparse
+import asyncio
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+
+import discord
+from discord.ext import commands
+
+import cogs.order as order_module
+
+GUILD_ID = 900000000000000001
+TICKET_TOOL_ID = 557628352828014614
+TICKET_TOOL_NAME = "Ticket Tool"
+TIMESTAMP = "2025-01-01T00:00:00+00:00"
+
+
+class LegacyOrderCog(commands.Cog):
+    """on_message ของ OrderCog ก่อนปรับ (ส่วนกรองข้อความ) ไว้เทียบ"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.tickets = 0
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author == self.bot:
+            return
+
+        if message.author.bot and message.author.name == TICKET_TOOL_NAME and message.embeds:
+            self.tickets += 1
+            return
+
+        if message.author.bot:
+            return
+
+        pass
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "global_name": None, "bot": bot}
+
+
+def member_payload(user: dict = None) -> dict:
+    data = {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False, "flags": 0}
+    if user is not None:
+        data["user"] = user
+    return data
+
+
+def guild_payload(channels: list[tuple[int, str]]) -> dict:
+    return {
+        "id": str(GUILD_ID),
+        "name": "IT Canteen",
+        "channels": [
+            {"id": str(channel_id), "type": 0, "name": name, "position": i, "permission_overwrites": []}
+            for i, (channel_id, name) in enumerate(channels)
+        ],
+        "roles": [{
+            "id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0,
+            "color": 0, "hoist": False, "managed": False, "mentionable": False,
+        }],
+        "members": [],
+        "member_count": 0,
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "unavailable": False,
+    }
+
+
+def make_messages(count: int, channels: list[tuple[int, str]], humans: list[dict], other_bots: list[dict]) -> list[dict]:
+    """
+    สัดส่วนโดยประมาณของข้อความในเซิร์ฟเวอร์คณะ:
+    คนคุยกันทั่วไป 90%, บอทอื่น 5%, คนพิมพ์ในช่องทิกเก็ต 4%, Ticket Tool เปิดทิกเก็ต 1%
+    """
+    ticket_tool = user_payload(TICKET_TOOL_ID, TICKET_TOOL_NAME, bot=True)
+    general = [c for c in channels if not c[1].startswith(order_module.TICKET_CHANNEL_PREFIX)]
+    tickets = [c for c in channels if c[1].startswith(order_module.TICKET_CHANNEL_PREFIX)]
+    messages = []
+    for i in range(count):
+        roll = random.random()
+        embeds = []
+        if roll < 0.90:
+            channel, author, content = random.choice(general), random.choice(humans), "ข้าวกลางวันกินอะไรดี"
+        elif roll < 0.95:
+            channel, author, content = random.choice(general), random.choice(other_bots), "🎵 Now playing"
+        elif roll < 0.99:
+            channel, author, content = random.choice(tickets), random.choice(humans), "ขอบคุณครับ"
+        else:
+            channel, author, content = random.choice(tickets), ticket_tool, ""
+            embeds = [{"type": "rich", "title": "Ticket", "description": "Support will be with you shortly."}]
+        messages.append({
+            "id": str(10 ** 17 + i),
+            "channel_id": str(channel[0]),
+            "guild_id": str(GUILD_ID),
+            "author": author,
+            "member": member_payload(),
+            "content": content,
+            "timestamp": TIMESTAMP,
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": embeds,
+            "pinned": False,
+            "type": 0,
+        })
+    return messages
+
+
+async def run(name: str, legacy: bool, trace: bool, messages: list[dict], channels, humans) -> dict:
+    if legacy:
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        bot = commands.Bot(command_prefix="!", intents=intents)
+    else:
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.dm_messages = True
+        intents.message_content = True
+        bot = commands.Bot(
+            command_prefix="!",
+            intents=intents,
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+            max_messages=None,
+        )
+
+    # ตั้ง bot.loop ฯลฯ เหมือนตอน bot.start() แต่ไม่ login
+    await bot.__aenter__()
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=user_payload(1, "ITcanteen", bot=True))
+
+    state_dir = tempfile.TemporaryDirectory()
+    if legacy:
+        cog = LegacyOrderCog(bot)
+        await bot.add_cog(cog)
+    else:
+        order_module.CHANNEL_STATE_DB = f"{state_dir.name}/channel_states.sqlite"
+        order_module.TICKET_TOOL_BOT_IDS = frozenset({TICKET_TOOL_ID})
+        cog = order_module.OrderCog(bot)
+        await bot.add_cog(cog)
+        # ไม่ต้องการให้ไปเรียก backend ในการวัดนี้: นับแค่ว่าผ่าน filter มากี่ครั้ง
+        cog.tickets = 0
+
+        async def fake_fetch_all_stores():
+            cog.tickets += 1
+            return {}
+        cog.fetch_all_stores = fake_fetch_all_stores
+        cog.stores_cache.set(order_module.ALL_STORES_KEY, {})
+
+    # วัดหน่วยความจำเฉพาะส่วนที่ต่างกัน: cache ของ guild/สมาชิก/ข้อความ (ไม่รวมตัว cog)
+    if trace:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    guild = state._add_guild_from_data(guild_payload(channels))
+    if legacy:
+        # intents.members -> discord.py chunk สมาชิกทั้งเซิร์ฟเวอร์เข้า cache ตอนเริ่ม
+        for user in humans:
+            guild._add_member(discord.Member(data=member_payload(user), guild=guild, state=state))
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for data in messages:
+        # discord.py เขียนทับ payload บางส่วน (member["user"]) จึงส่งสำเนาให้ทุกรอบ
+        data = dict(data, member=member_payload())
+        if legacy and not data["author"].get("bot"):
+            state.parse_typing_start({
+                "channel_id": data["channel_id"],
+                "guild_id": data["guild_id"],
+                "user_id": data["author"]["id"],
+                "timestamp": 1735689600,
+                "member": member_payload(data["author"]),
+            })
+        state.parse_message_create(data)
+        # ให้ task ของ on_message ได้ทำงาน (เหมือน event loop ระหว่างรับ event จาก gateway)
+        await asyncio.sleep(0)
+    while any(task.get_name().startswith("discord.py: ") for task in asyncio.all_tasks()):
+        await asyncio.sleep(0)
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    retained = 0
+    if trace:
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+    await bot.remove_cog(cog.qualified_name)
+    await bot.close()
+    state_dir.cleanup()
+    return {
+        "name": name,
+        "cpu_per_1k": cpu / len(messages) * 1000 * 1000,
+        "wall_per_1k": wall / len(messages) * 1000 * 1000,
+        "retained_mb": retained / 1024 / 1024,
+        "cached_messages": len(state._messages or ()),
+        "cached_members": len(guild.members),
+        "tickets": cog.tickets,
+    }
+
+
+async def fake_send(*args, **kwargs):
+    return None
+
+
+async def main():
+    # ข้อความที่ cog ส่งกลับไม่ต้องไปถึง Discord จริง
+    discord.abc.Messageable.send = fake_send
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000, help="จำนวนข้อความที่ป้อน")
+    parser.add_argument("--members", type=int, default=3000, help="จำนวนสมาชิกในเซิร์ฟเวอร์")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    channels = [(800000000000000000 + i, f"general-{i}") for i in range(20)]
+    channels += [(810000000000000000 + i, f"{order_module.TICKET_CHANNEL_PREFIX}{i:04d}") for i in range(50)]
+    humans = [user_payload(700000000000000000 + i, f"student-{i}") for i in range(args.members)]
+    other_bots = [user_payload(600000000000000000 + i, f"music-bot-{i}", bot=True) for i in range(3)]
+    messages = make_messages(args.messages, channels, humans, other_bots)
+
+    print(f"messages={args.messages} members={args.members}")
+    for legacy, name in ((True, "legacy"), (False, "trimmed")):
+        # รอบแรกวัด CPU (tracemalloc ทำให้ช้าลงมาก) รอบสองวัดหน่วยความจำ
+        result = await run(name, legacy, False, messages, channels, humans)
+        result["retained_mb"] = (await run(name, legacy, True, messages, channels, humans))["retained_mb"]
+        print(
+            f"{result['name']:<8} cpu={result['cpu_per_1k']:7.1f}ms/1k msgs  wall={result['wall_per_1k']:7.1f}ms/1k msgs  "
+            f"retained={result['retained_mb']:6.2f}MB  cached messages={result['cached_messages']:<5} "
+            f"cached members={result['cached_members']:<5} ticket welcomes={result['tickets']}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+ตรวจ utils/lookup.py แบบเร็ว ๆ (offline): ชื่อที่ควรหาเจอต้องเจอ ชื่อที่ต่างกันจริงต้องไม่ถูกจับคู่กัน
+
+วิธีรัน (จากโฟลเดอร์ Discord-Bot):
+    python -m bench.check_lookup
+"""
+import sys
+
+from utils.lookup import LookupIndex, loose_key
+
+# (คำค้น, ชื่อในเมนู) ที่ต้องหาเจอ: ต่างกันแค่ช่องว่าง/วรรณยุกต์/การันต์/เครื่องหมาย
+SHOULD_MATCH = [
+    ("ต้มยำกุ้ง", "ต้มยำกุ้ง"),
+    ("ตมยำกุง", "ต้มยำกุ้ง"),
+    ("ต้มยำ กุ้ง", "ต้มยำกุ้ง"),
+    ("ข้าวผัด-กุ้ง", "ข้าวผัดกุ้ง"),
+    ("ก๋วยเตี๋ยว.", "ก๋วยเตี๋ยว"),
+    ("ไก่ทอด(พิเศษ)", "ไก่ทอด พิเศษ"),
+]
+
+# ชื่อที่ต่างกันแค่สระ เป็นคนละเมนู: loose key ต้องไม่เท่ากัน
+SHOULD_DIFFER = [
+    ("ต้มยำกุ้ง", "ต้มยำกั้ง"),
+    ("กิน", "กุน"),
+    ("กิน", "ก้น"),
+    ("กุน", "ก้น"),
+    ("ข้าวมันไก่", "ข้าวมนไก่"),
+    ("เป็ด", "เปด"),
+]
+
+
+def main() -> int:
+    failures = []
+    for query, name in SHOULD_MATCH:
+        index = LookupIndex([(name, name)])
+        if index.find(query) != name:
+            failures.append(f"expected {query!r} to find {name!r}")
+    for a, b in SHOULD_DIFFER:
+        if loose_key(a) == loose_key(b):
+            failures.append(f"{a!r} and {b!r} share loose key {loose_key(a)!r}")
+        if LookupIndex([(a, a)]).find(b) is not None:
+            failures.append(f"{b!r} must not match menu item {a!r}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print(f"{len(SHOULD_MATCH) + len(SHOULD_DIFFER)} cases, {len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Discord ปลอม (REST + gateway) สำหรับทดสอบโหมด shard/หลายโปรเซสในเครื่อง ไม่ต้องใช้ token จริง
+
+รองรับเท่าที่บอทใช้ตอนเริ่มและตอนเปิดทิกเก็ต:
+  REST     /users/@me, /oauth2/applications/@me, /gateway/bot, sync slash command,
+           POST ข้อความ (เก็บไว้ใน `sent` เพื่อตรวจผล)
+  gateway  HELLO -> IDENTIFY -> READY -> GUILD_CREATE ของ guild ที่อยู่บน shard นั้น
+           ((guild_id >> 22) % shard_count) และตอบ heartbeat
+ส่ง event เข้า shard ที่ถือ guild ได้ด้วย `dispatch()` / `open_ticket()`
+
+ใช้กับบอทผ่าน environment (ดู bench/shard_test.py):
+    BOT_FAKE_DISCORD=1 BOT_DATA_DIR=<โฟลเดอร์ชั่วคราว>
+    DISCORD_API_BASE=http://127.0.0.1:<port>/api/v10
+    DISCORD_GATEWAY_URL=ws://127.0.0.1:<port>/gateway
+"""
+import itertools
+import json
+import logging
+
+from aiohttp import WSMsgType, web
+
+from utils.sharding import guild_shard_id
+
+log = logging.getLogger(__name__)
+
+BOT_USER_ID = 1000000000000000001
+APPLICATION_ID = 1000000000000000002
+TICKET_TOOL_ID = 557628352828014614
+TIMESTAMP = "2025-01-01T00:00:00+00:00"
+HEARTBEAT_INTERVAL_MS = 41250
+
+OP_DISPATCH, OP_HEARTBEAT, OP_IDENTIFY, OP_PRESENCE, OP_HELLO, OP_HEARTBEAT_ACK = 0, 1, 2, 3, 10, 11
+
+
+def json_response(data, status: int = 200) -> web.Response:
+    # discord.py แปลง body เป็น JSON ก็ต่อเมื่อ content-type เป็น "application/json" ตรงตัว (ไม่มี charset)
+    return web.Response(body=json.dumps(data).encode(), status=status, content_type="application/json")
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "global_name": None, "bot": bot}
+
+
+def message_payload(message_id: int, channel_id: int, author: dict, content: str = "", guild_id: int = None, embeds=()) -> dict:
+    data = {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "author": author,
+        "content": content,
+        "timestamp": TIMESTAMP,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": list(embeds),
+        "pinned": False,
+        "type": 0,
+    }
+    if guild_id is not None:
+        data["guild_id"] = str(guild_id)
+        data["member"] = {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False, "flags": 0}
+    return data
+
+
+class FakeGuild:
+    """guild หนึ่งมีช่อง general 1 ช่องและช่องทิกเก็ต `tickets` ช่อง"""
+
+    def __init__(self, index: int, tickets: int, ticket_prefix: str):
+        # index อยู่ในบิตที่ใช้คำนวณ shard -> guild กระจายไปทุก shard เท่า ๆ กัน
+        self.id = ((1 << 20) + index) << 22
+        self.index = index
+        self.general_id = self.id + 1
+        self.ticket_ids = [self.id + 2 + i for i in range(tickets)]
+        self.ticket_prefix = ticket_prefix
+
+    def payload(self) -> dict:
+        channels = [(self.general_id, "general")]
+        channels += [(channel_id, f"{self.ticket_prefix}{i:04d}") for i, channel_id in enumerate(self.ticket_ids)]
+        return {
+            "id": str(self.id),
+            "name": f"Guild {self.index}",
+            "channels": [
+                {"id": str(channel_id), "type": 0, "name": name, "position": i, "permission_overwrites": []}
+                for i, (channel_id, name) in enumerate(channels)
+            ],
+            "roles": [{
+                "id": str(self.id), "name": "@everyone", "permissions": "0", "position": 0,
+                "color": 0, "hoist": False, "managed": False, "mentionable": False,
+            }],
+            "members": [],
+            "member_count": 1,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "threads": [],
+            "voice_states": [],
+            "presences": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "large": False,
+            "unavailable": False,
+        }
+
+
+class FakeDiscord:
+
+    def __init__(self, shard_count: int, guilds: int, tickets_per_guild: int = 2,
+                 ticket_prefix: str = "ticket-", host: str = "127.0.0.1", port: int = 0):
+        self.shard_count = shard_count
+        self.guilds = [FakeGuild(i, tickets_per_guild, ticket_prefix) for i in range(guilds)]
+        self.host = host
+        self.port = port
+        self.identified: dict[int, int] = {}        # shard id -> จำนวนครั้งที่ IDENTIFY
+        self.presence: set[int] = set()             # shard ที่ส่ง presence แล้ว (on_ready ของบอททำงานแล้ว)
+        self.sent: list[tuple[int, str]] = []       # (channel id, content) ที่บอทส่ง
+        self.command_syncs = 0
+        self._sockets: dict[int, web.WebSocketResponse] = {}
+        self._sequence: dict[int, int] = {}
+        self._ids = itertools.count(2 * 10 ** 18)
+        self._runner = None
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v10"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/gateway"
+
+    def shard_guilds(self, shard_id: int) -> list[FakeGuild]:
+        return [g for g in self.guilds if guild_shard_id(g.id, self.shard_count) == shard_id]
+
+    # ---------- REST ----------
+
+    async def handle_me(self, request: web.Request):
+        return json_response(user_payload(BOT_USER_ID, "ITcanteen", bot=True))
+
+    async def handle_application(self, request: web.Request):
+        return json_response({
+            "id": str(APPLICATION_ID),
+            "name": "ITcanteen",
+            "description": "",
+            "icon": None,
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": user_payload(1, "owner"),
+            "verify_key": "0" * 64,
+            "flags": 0,
+        })
+
+    async def handle_gateway(self, request: web.Request):
+        return json_response({
+            "url": self.gateway_url,
+            "shards": self.shard_count,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def handle_sync(self, request: web.Request):
+        self.command_syncs += 1
+        return json_response([])
+
+    async def handle_send(self, request: web.Request):
+        channel_id = int(request.match_info["channel_id"])
+        body = await request.json()
+        self.sent.append((channel_id, body.get("content") or ""))
+        author = user_payload(BOT_USER_ID, "ITcanteen", bot=True)
+        return json_response(message_payload(next(self._ids), channel_id, author, body.get("content") or ""))
+
+    async def handle_unknown(self, request: web.Request):
+        log.warning("fake discord: unhandled %s %s", request.method, request.path)
+        return json_response({"message": "404: Not Found", "code": 0}, status=404)
+
+    # ---------- gateway ----------
+
+    async def handle_gateway_ws(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"op": OP_HELLO, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL_MS}})
+        shard_id = None
+        async for frame in ws:
+            if frame.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(frame.data)
+            op = payload.get("op")
+            if op == OP_HEARTBEAT:
+                await ws.send_json({"op": OP_HEARTBEAT_ACK, "d": None})
+            elif op == OP_IDENTIFY:
+                shard_id, shard_count = payload["d"].get("shard", [0, 1])
+                if shard_count != self.shard_count:
+                    await ws.close(code=4010, message=b"Invalid shard")
+                    break
+                self.identified[shard_id] = self.identified.get(shard_id, 0) + 1
+                self._sockets[shard_id] = ws
+                await self._ready(shard_id)
+            elif op == OP_PRESENCE and shard_id is not None:
+                self.presence.add(shard_id)
+        if shard_id is not None and self._sockets.get(shard_id) is ws:
+            del self._sockets[shard_id]
+        return ws
+
+    async def _ready(self, shard_id: int):
+        guilds = self.shard_guilds(shard_id)
+        await self.dispatch(shard_id, "READY", {
+            "v": 10,
+            "user": user_payload(BOT_USER_ID, "ITcanteen", bot=True),
+            "guilds": [{"id": str(g.id), "unavailable": True} for g in guilds],
+            "session_id": f"session-{shard_id}",
+            "resume_gateway_url": self.gateway_url,
+            "shard": [shard_id, self.shard_count],
+            "application": {"id": str(APPLICATION_ID), "flags": 0},
+        })
+        for guild in guilds:
+            await self.dispatch(shard_id, "GUILD_CREATE", guild.payload())
+
+    async def dispatch(self, shard_id: int, event: str, data: dict):
+        ws = self._sockets[shard_id]
+        sequence = self._sequence[shard_id] = self._sequence.get(shard_id, 0) + 1
+        await ws.send_json({"op": OP_DISPATCH, "t": event, "s": sequence, "d": data})
+
+    async def open_ticket(self, guild: FakeGuild, channel_id: int):
+        """Ticket Tool ส่ง embed เปิดทิกเก็ตในช่อง (ส่งเข้า shard ที่ถือ guild นั้น)"""
+        author = user_payload(TICKET_TOOL_ID, "Ticket Tool", bot=True)
+        embeds = [{"type": "rich", "title": "Ticket", "description": "Support will be with you shortly."}]
+        data = message_payload(next(self._ids), channel_id, author, guild_id=guild.id, embeds=embeds)
+        await self.dispatch(guild_shard_id(guild.id, self.shard_count), "MESSAGE_CREATE", data)
+
+    # ---------- lifecycle ----------
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/gateway", self.handle_gateway_ws)
+        app.router.add_get("/api/v10/users/@me", self.handle_me)
+        app.router.add_get("/api/v10/oauth2/applications/@me", self.handle_application)
+        app.router.add_get("/api/v10/gateway/bot", self.handle_gateway)
+        app.router.add_put("/api/v10/applications/{app_id}/commands", self.handle_sync)
+        app.router.add_put("/api/v10/applications/{app_id}/guilds/{guild_id}/commands", self.handle_sync)
+        app.router.add_post("/api/v10/channels/{channel_id}/messages", self.handle_send)
+        app.router.add_route("*", "/{tail:.*}", self.handle_unknown)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        for ws in list(self._sockets.values()):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,204 @@
+"""
+วัตถุ Discord ปลอมสำหรับ benchmark (ไม่ต่อ gateway จริง)
+
+จำลองเฉพาะ attribute/method ที่ cog ในโปรเจกต์นี้เรียกใช้ และนับจำนวนครั้งที่บอท
+"เรียก Discord" (send / edit / add_roles / ...) เพื่อรายงานต่อคำสั่ง
+"""
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+
+import discord
+
+_ids = itertools.count(1_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class DiscordCalls:
+    """ตัวนับการเรียก Discord API (ใช้ร่วมกันทุก fake)"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.count = 0
+
+    async def hit(self):
+        self.count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeUser:
+    def __init__(self, name: str, bot: bool = False, user_id: int = None):
+        self.id = user_id or next_id()
+        self.name = name
+        self.bot = bot
+        self.avatar = None
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMessage:
+    def __init__(self, calls: DiscordCalls, channel, author, content: str = "", embeds=None):
+        self._calls = calls
+        self.id = next_id()
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.attachments = []
+        self.edits = []     # content ของทุกครั้งที่ edit (ตรวจข้อความสถานะระหว่างทางได้)
+        self.guild = getattr(channel, "guild", None)
+
+    async def edit(self, content=discord.utils.MISSING, embed=discord.utils.MISSING, **kwargs):
+        await self._calls.hit()
+        if content is not discord.utils.MISSING:
+            self.content = content
+            self.edits.append(content)
+        if embed is not discord.utils.MISSING:
+            self.embeds = [embed] if embed else []
+        return self
+
+
+class FakeChannel:
+    def __init__(self, calls: DiscordCalls, name: str, guild=None, channel_id: int = None):
+        self._calls = calls
+        self.id = channel_id or next_id()
+        self.name = name
+        self.guild = guild
+        self.sent = []
+
+    async def send(self, content=None, *, embed=None, file=None, **kwargs):
+        await self._calls.hit()
+        message = FakeMessage(self._calls, self, None, content or "", [embed] if embed else [])
+        if file is not None:
+            # ลิงก์ไฟล์แนบแบบ Discord จริง (หมดอายุใน 1 วัน)
+            expiry = format(int(time.time()) + 86400, "x")
+            url = f"https://cdn.discordapp.com/attachments/{self.id}/{message.id}/{file.filename}?ex={expiry}"
+            message.attachments.append(SimpleNamespace(url=url, filename=file.filename))
+        self.sent.append(message)
+        return message
+
+
+class FakeContext:
+    """แทน commands.Context: cog ใช้แค่ channel, author, message และ send()"""
+
+    def __init__(self, calls: DiscordCalls, channel: FakeChannel, author: FakeUser, content: str):
+        self.channel = channel
+        self.author = author
+        self.guild = channel.guild
+        self.message = FakeMessage(calls, channel, author, content)
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str = "Verified"):
+        self.id = role_id
+        self.name = name
+
+
+class FakeGuild:
+    def __init__(self, roles=()):
+        self.id = next_id()
+        self._roles = {role.id: role for role in roles}
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+
+class FakeMember(discord.Member):
+    """
+    สืบจาก discord.Member เพื่อให้ผ่าน isinstance(..., discord.Member) ใน cog
+    แต่ไม่เรียก __init__ ของจริง (ซึ่งต้องใช้ข้อมูลจาก gateway)
+    """
+
+    def __init__(self, calls: DiscordCalls, guild: FakeGuild, name: str):
+        self._calls = calls
+        self._fake_id = next_id()
+        self._fake_name = name
+        self._fake_roles = []
+        self.guild = guild
+        self.nick = None
+
+    id = property(lambda self: self._fake_id)
+    name = property(lambda self: self._fake_name)
+    roles = property(lambda self: list(self._fake_roles))
+
+    async def add_roles(self, *roles, **kwargs):
+        await self._calls.hit()
+        self._fake_roles.extend(roles)
+
+    async def edit(self, *, nick=discord.utils.MISSING, **kwargs):
+        await self._calls.hit()
+        if nick is not discord.utils.MISSING:
+            self.nick = nick
+        return self
+
+
+class _FakeResponse:
+    def __init__(self, calls: DiscordCalls):
+        self._calls = calls
+        self.deferred = False
+
+    async def send_message(self, content=None, **kwargs):
+        await self._calls.hit()
+
+    async def defer(self, **kwargs):
+        await self._calls.hit()
+        self.deferred = True
+
+
+class _FakeFollowup:
+    def __init__(self, calls: DiscordCalls):
+        self._calls = calls
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        await self._calls.hit()
+        self.messages.append(content)
+
+
+class FakeInteraction:
+    """แทน discord.Interaction สำหรับ slash command (/verify)"""
+
+    def __init__(self, calls: DiscordCalls, guild: FakeGuild, user):
+        self.guild = guild
+        self.user = user
+        self.response = _FakeResponse(calls)
+        self.followup = _FakeFollowup(calls)
+
+
+class FakeBot:
+    """แทน commands.Bot เท่าที่ cog ใช้ (loop, wait_until_ready, get_channel, user)"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.user = FakeUser("ITcanteen", bot=True)
+        self.latency = 0.05
+        self.channels = {}
+        self._ready = asyncio.Event()
+
+    def set_ready(self):
+        self._ready.set()
+
+    async def wait_until_ready(self):
+        await self._ready.wait()
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def change_presence(self, **kwargs):
+        pass
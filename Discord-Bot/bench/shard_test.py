@@ -0,0 +1,117 @@
+"""
+ทดสอบโหมดหลายโปรเซส (launcher.py) กับ Discord ปลอมและ stub ของ Go API ในเครื่อง
+
+  1. เปิด bench/fake_discord.py (gateway + REST) และ bench/stub_api.py
+  2. รัน `launcher.py --shards S --processes P` ชี้ไปที่ทั้งสองตัว
+  3. รอจนทุก shard IDENTIFY และ on_ready ทำงาน (บอทส่ง presence มาครบทุก shard)
+  4. Ticket Tool เปิดทิกเก็ตในทุกช่องทิกเก็ตของทุก guild พร้อมกัน
+  5. ตรวจว่าทุกช่องได้ข้อความต้อนรับ "ครั้งเดียว" (ไม่มีโปรเซสไหนตอบ guild ที่ไม่ใช่ของตัวเอง)
+     และรายงานจำนวน request ที่ไป backend (cache ร้านแชร์กันผ่าน shared_cache.sqlite)
+
+บอททุกโปรเซสรันด้วย BOT_FAKE_DISCORD=1 และ BOT_DATA_DIR เป็นโฟลเดอร์ชั่วคราว (เริ่มจาก state ว่าง
+และไม่แตะ data/ จริงของเครื่องที่รัน)
+
+discord.py รอ 5 วินาทีระหว่าง IDENTIFY แต่ละ shard ในโปรเซสเดียวกัน ทั้งการทดสอบจึงใช้เวลาราว
+5 * (S / P) วินาที
+
+วิธีรัน (จากโฟลเดอร์ Discord-Bot):
+    python -m bench.shard_test --shards 4 --processes 2 --guilds 8
+"""
+import argparse
+import asyncio
+import collections
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import cogs.order as order_module
+from bench.fake_discord import FakeDiscord
+from bench.stub_api import StubAPI
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WELCOME_PREFIX = "ยินดีต้อนรับ"
+
+
+async def wait_for(predicate, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"timed out waiting for {what}")
+        await asyncio.sleep(0.1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=4, help="จำนวน shard ทั้งหมด")
+    parser.add_argument("--processes", type=int, default=2, help="จำนวนโปรเซสของบอท")
+    parser.add_argument("--guilds", type=int, default=8, help="จำนวน guild (กระจายทุก shard)")
+    parser.add_argument("--tickets", type=int, default=3, help="จำนวนช่องทิกเก็ตต่อ guild")
+    parser.add_argument("--timeout", type=float, default=60.0, help="(วินาที) รอแต่ละขั้นนานสุด")
+    args = parser.parse_args()
+
+    fake = FakeDiscord(args.shards, args.guilds, args.tickets, ticket_prefix=order_module.TICKET_CHANNEL_PREFIX)
+    stub = StubAPI()
+    await fake.start()
+    await stub.start()
+
+    # state ทั้งหมดอยู่ในโฟลเดอร์ชั่วคราว: cache ว่างตอนเริ่ม จำนวน request ไป backend จึงตรงกับการทดสอบนี้
+    data_dir = tempfile.TemporaryDirectory(prefix="shard-test-")
+    env = dict(
+        os.environ,
+        BOT_FAKE_DISCORD="1",
+        BOT_DATA_DIR=data_dir.name,
+        DISCORD_TOKEN="fake-token",
+        DISCORD_API_BASE=fake.api_base,
+        DISCORD_GATEWAY_URL=fake.gateway_url,
+        API_URL=stub.base_url,
+        BOT_METRICS_PORT="0",
+    )
+    launcher = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(BOT_DIR, "launcher.py"),
+        "--shards", str(args.shards), "--processes", str(args.processes),
+        cwd=BOT_DIR, env=env,
+    )
+    failed = False
+    try:
+        started = time.perf_counter()
+        await wait_for(lambda: len(fake.presence) == args.shards, args.timeout, "all shards to become ready")
+        print(f"all {args.shards} shards ready after {time.perf_counter() - started:.1f}s, identifies={dict(sorted(fake.identified.items()))}")
+
+        tickets = [(guild, channel_id) for guild in fake.guilds for channel_id in guild.ticket_ids]
+        requests_before = stub.requests
+        started = time.perf_counter()
+        await asyncio.gather(*(fake.open_ticket(guild, channel_id) for guild, channel_id in tickets))
+
+        def welcomed() -> collections.Counter:
+            return collections.Counter(channel_id for channel_id, content in fake.sent if content.startswith(WELCOME_PREFIX))
+
+        await wait_for(lambda: len(welcomed()) == len(tickets), args.timeout, "welcome messages")
+        # เผื่อเวลาให้ข้อความซ้ำ (ถ้ามี) ตามมาถึง
+        await asyncio.sleep(1.0)
+        counts = welcomed()
+        duplicates = {channel_id: n for channel_id, n in counts.items() if n > 1}
+        print(
+            f"{len(tickets)} tickets welcomed in {time.perf_counter() - started:.2f}s, duplicates={len(duplicates)}, "
+            f"backend requests: warm-up={requests_before} tickets={stub.requests - requests_before}, "
+            f"command syncs={fake.command_syncs}"
+        )
+        failed = bool(duplicates) or any(n != 1 for n in fake.identified.values()) or fake.command_syncs > 1
+    except TimeoutError as e:
+        print(f"FAILED: {e} (identifies={fake.identified}, ready shards={sorted(fake.presence)}, sent={len(fake.sent)})")
+        failed = True
+    finally:
+        if launcher.returncode is None:
+            launcher.send_signal(signal.SIGINT)
+            await launcher.wait()
+        data_dir.cleanup()
+        await fake.stop()
+        await stub.stop()
+
+    print("FAILED" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
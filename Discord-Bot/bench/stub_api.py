@@ -0,0 +1,130 @@
+"""
+Stub ของ Go backend (:8080) สำหรับใช้ benchmark บอทแบบ offline
+รองรับเฉพาะ endpoint ที่บอทเรียกใช้: /store, /store/product, /store/orders, /orders/add
+"""
+import asyncio
+
+from aiohttp import web
+
+STUB_STORES = [
+    {"store_id": 1, "name": "ร้านก๋วยเตี๋ยว", "image_url": "", "menu_url": ""},
+    {"store_id": 2, "name": "ร้านข้าวมันไก่", "image_url": "", "menu_url": ""},
+]
+
+STUB_PRODUCTS = {
+    1: [
+        {"product_id": 1, "store_id": 1, "name": "เส้นเล็กน้ำใส", "price": 40, "image_url": ""},
+        {"product_id": 2, "store_id": 1, "name": "เส้นใหญ่ต้มยำ", "price": 45, "image_url": ""},
+    ],
+    2: [
+        {"product_id": 3, "store_id": 2, "name": "ข้าวมันไก่", "price": 45, "image_url": ""},
+        {"product_id": 4, "store_id": 2, "name": "ข้าวมันไก่ทอด", "price": 50, "image_url": ""},
+    ],
+}
+
+
+class StubAPI:
+    """
+    เซิร์ฟเวอร์ stub ที่นับจำนวน request และจำนวน TCP connection ที่ถูกเปิด
+    `latency` คือเวลาหน่วง (วินาที) ที่ใส่ให้ทุก request เพื่อจำลอง backend
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self.orders = []
+        self.fail_orders = 0        # จำนวน POST /orders/add ถัดไปที่จะตอบ 503 (จำลอง backend ล่ม)
+        self.drop_orders = 0        # จำนวน POST /orders/add ถัดไปที่สร้างออเดอร์แล้วตัด connection ก่อนตอบ
+        self.replays = 0            # จำนวนครั้งที่ตอบด้วย response เดิมของ Idempotency-Key ที่เคยเห็น
+        self._idempotency = {}      # { Idempotency-Key: response body ของครั้งแรก }
+        self._transports = set()
+        self._runner = None
+
+    @property
+    def connections(self) -> int:
+        """จำนวน TCP connection (ไม่ซ้ำกัน) ที่ server ได้รับ"""
+        return len(self._transports)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _delay(self, request: web.Request):
+        self.requests += 1
+        self._transports.add(request.transport)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def handle_stores(self, request: web.Request):
+        await self._delay(request)
+        return web.json_response(STUB_STORES)
+
+    async def handle_products(self, request: web.Request):
+        await self._delay(request)
+        try:
+            store_id = int(request.query.get("store_id", ""))
+        except ValueError:
+            return web.Response(status=400, text="Invalid store_id")
+        if store_id not in STUB_PRODUCTS:
+            return web.Response(status=404, text="Store not found")
+        return web.json_response(STUB_PRODUCTS[store_id])
+
+    async def handle_add_order(self, request: web.Request):
+        await self._delay(request)
+        if self.fail_orders > 0:
+            self.fail_orders -= 1
+            return web.Response(status=503, text="Service unavailable")
+        key = request.headers.get("Idempotency-Key")
+        if key and key in self._idempotency:
+            # เหมือน backend จริง: ตอบ response ของครั้งแรกกลับไปทั้งก้อน
+            self.replays += 1
+            return web.json_response(self._idempotency[key])
+        payload = await request.json()
+        order_id = len(self.orders) + 1
+        self.orders.append({**payload, "order_id": order_id, "paid": False, "done": False})
+        response = {"id": order_id}
+        if key:
+            self._idempotency[key] = response
+        if self.drop_orders > 0:
+            # ออเดอร์ถูกสร้างแล้วแต่ response หาย: บอทต้องลองใหม่ด้วย key เดิมโดยไม่ได้ออเดอร์ซ้ำ
+            self.drop_orders -= 1
+            request.transport.abort()
+            return web.Response(status=499)
+        return web.json_response(response)
+
+    async def handle_store_orders(self, request: web.Request):
+        await self._delay(request)
+        try:
+            store_id = int(request.query.get("store_id", ""))
+        except ValueError:
+            return web.Response(status=400, text="Invalid store_id")
+        # Go ส่ง null เมื่อไม่มีออเดอร์ (nil slice)
+        return web.json_response([order for order in self.orders if order["store_id"] == store_id] or None)
+
+    def mark_done(self, order_id: int, paid: bool = True):
+        """จำลองร้านกดว่าออเดอร์เสร็จ (เหมือน POST /orders/update)"""
+        order = self.orders[order_id - 1]
+        order["paid"] = order["paid"] or paid
+        order["done"] = True
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/store", self.handle_stores)
+        app.router.add_get("/store/product", self.handle_products)
+        app.router.add_get("/store/orders", self.handle_store_orders)
+        app.router.add_post("/orders/add", self.handle_add_order)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
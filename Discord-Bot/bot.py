@@ -1,32 +1,83 @@
 import discord
 from discord.ext import commands
 import logging
+import yarl
 from dotenv import load_dotenv
 
+from utils.cog_loader import load_cogs
+from utils.logs import setup_logging
+from utils.sharding import shard_config_from_env
+
 # for cogs
 import os
 import asyncio
+import time
 
 load_dotenv()
 token = os.getenv('DISCORD_TOKEN')
 
-# handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
-intents = discord.Intents.default()
+# log ทั้งหมด (ของบอทและ discord.py) ไปที่ logs/bot.log ผ่านคิว ดู utils/logs.py
+log = logging.getLogger("bot")
+
+# เปิดเฉพาะ event ที่บอทใช้จริง: ช่อง (guilds), ข้อความ + เนื้อหา (คำสั่ง ! และ Ticket Tool)
+# ไม่เปิด members/presences/typing/reactions และไม่เก็บ cache สมาชิก/ข้อความ
+# (/verify ได้ข้อมูลสมาชิกมากับ interaction อยู่แล้ว ไม่ต้อง cache ทั้งเซิร์ฟเวอร์)
+intents = discord.Intents.none()
+intents.guilds = True
+intents.guild_messages = True
+intents.dm_messages = True
 intents.message_content = True
-intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# shard: ค่าเริ่มต้นเป็นบอทธรรมดา, BOT_AUTO_SHARD=1 หรือรันผ่าน launcher.py (หลายโปรเซส) ดู utils/sharding.py
+shards = shard_config_from_env()
+bot_options = dict(
+    command_prefix="!",
+    intents=intents,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None,
+)
+if shards.sharded:
+    bot = commands.AutoShardedBot(shard_count=shards.shard_count, shard_ids=shards.shard_ids, **bot_options)
+else:
+    bot = commands.Bot(**bot_options)
+
+# สำหรับทดสอบกับ Discord ปลอมในเครื่อง (bench/fake_discord.py) เท่านั้น: ต้องเปิด BOT_FAKE_DISCORD=1 เอง
+# และต้องใช้ BOT_DATA_DIR แยกจาก data/ จริง ไม่งั้นบอทที่เห็น guild ปลอมจะลบ state ของช่องทิกเก็ตจริงทิ้ง
+if os.getenv("BOT_FAKE_DISCORD", "0") == "1":
+    if not os.getenv("BOT_DATA_DIR"):
+        raise SystemExit("BOT_FAKE_DISCORD=1 requires BOT_DATA_DIR pointing at a scratch directory")
+    if os.getenv("DISCORD_API_BASE"):
+        discord.http.Route.BASE = os.getenv("DISCORD_API_BASE")
+    if os.getenv("DISCORD_GATEWAY_URL"):
+        # ถ้ากำหนด shard_count เอง discord.py จะไม่ถาม /gateway/bot แต่ต่อ gateway ค่าเริ่มต้นตรง ๆ
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(os.getenv("DISCORD_GATEWAY_URL"))
+
+started = time.perf_counter()
 
-# cogs loader
-async def load_cogs():
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py'):
-            await bot.load_extension(f"cogs.{filename[:-3]}")
+# cogs loader (ดู utils/cog_loader.py)
+async def report_ready():
+    """log เวลาตั้งแต่เริ่มโปรเซสจนพร้อมรับออเดอร์ (OrderCog warm-up เสร็จ)"""
+    await bot.wait_until_ready()
+    log.info("Connected to Discord after %.2fs", time.perf_counter() - started)
+    order_cog = bot.get_cog("OrderCog")
+    if order_cog is not None:
+        await order_cog.warmed_up.wait()
+        log.info("Ready to take orders after %.2fs", time.perf_counter() - started)
 
 async def main():
+    log.info("Starting bot (%r)", shards)
     async with bot:
-        await load_cogs()
+        await load_cogs(bot)
+        ready_task = asyncio.create_task(report_ready())
         await bot.start(token)
 
-# bot.run(token,log_handler=handler,log_level=logging.DEBUG)
-asyncio.run(main())
\ No newline at end of file
+listener = setup_logging(
+    filename=f"bot-shards-{'_'.join(map(str, shards.shard_ids))}.log" if shards.shard_ids else "bot.log"
+)
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    log.info("Bot stopped")
+finally:
+    listener.stop()
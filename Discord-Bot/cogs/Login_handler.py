@@ -2,23 +2,84 @@ import discord
 from discord import activity
 from discord.ext import commands
 from discord import app_commands
+import asyncio
+import logging
+import os
+
+from utils.command_sync import sync_if_changed
+from utils.metrics import metrics
+from utils.roster import Roster
+from utils.sharding import owns_shard_zero
+from utils.submit_queue import QueueFull, SubmissionQueue
+
+log = logging.getLogger(__name__)
 
 GUILD_ID = 1418981762872115343
 VERIFIED_ROLE_ID = 1433761427767951473
-TMPDATA = {
-    "68070013" : "จิรพงศ์ บุญช่วยเหลือ",
-    "68070036" : "ณฐภัทร สมุทรผ่อง",
-    "68070063" : "ธรรมธัช ก้อนนาค",
-    "68070070" : "ธีรพล อักษรหรั่ง",
-    "68070143" : "ภูริ งาดีสงวนนาม",
-    "68070000" : "อจ.โชติพัชร์",
-}
+
+# Student roster: CSV (student_id,name) is imported into SQLite and re-imported when the file changes
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.getenv("BOT_DATA_DIR") or os.path.join(BOT_DIR, "data")   # same directory as cogs/order.py
+ROSTER_CSV = os.getenv("ROSTER_CSV", os.path.join(BOT_DIR, "roster.csv"))
+ROSTER_DB = os.path.join(DATA_DIR, "roster.sqlite")
+ROSTER_CACHE_SIZE = 4096       # names kept in memory (LRU)
+ROSTER_RELOAD_INTERVAL = 60    # seconds between checks of the CSV modification time
+
+# Verification queue: role/nickname edits go through a few workers so a burst of /verify
+# stays inside Discord's per-guild rate limits instead of piling up hundreds of requests
+VERIFY_QUEUE_WORKERS = 4
+VERIFY_QUEUE_MAX_DEPTH = 500
+VERIFY_MAX_ATTEMPTS = 4
+VERIFY_RETRY_BASE_DELAY = 1.0
+VERIFY_RETRY_MAX_DELAY = 16.0
+
+# Slash command sync: only when the command tree's fingerprint changes
+COMMAND_SYNC_STATE = os.path.join(DATA_DIR, "command_sync.json")
+DEV_GUILD_SYNC = os.getenv("DEV_GUILD_SYNC", "0") == "1"   # development: sync to GUILD_ID only (instant)
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "0") == "1"
 
 class Login(commands.Cog):
  
     def __init__(self, bot):
         self.bot = bot
         self._synced = False
+        self.roster = Roster(ROSTER_DB, ROSTER_CSV, cache_size=ROSTER_CACHE_SIZE, reload_interval=ROSTER_RELOAD_INTERVAL)
+        self.verify_queue = None
+
+    async def cog_load(self):
+        count = await self.roster.load()
+        self.roster.start()
+        self.verify_queue = SubmissionQueue(
+            self._apply_verification,
+            workers=VERIFY_QUEUE_WORKERS,
+            max_depth=VERIFY_QUEUE_MAX_DEPTH,
+            max_attempts=VERIFY_MAX_ATTEMPTS,
+            base_delay=VERIFY_RETRY_BASE_DELAY,
+            max_delay=VERIFY_RETRY_MAX_DELAY,
+        )
+        self.verify_queue.start()
+        metrics.register_collector("roster", self._collect_metrics)
+        log.info("Roster ready: %d students", count)
+
+    async def cog_unload(self):
+        metrics.unregister_collector("roster")
+        if self.verify_queue is not None:
+            await self.verify_queue.close()
+        await self.roster.close()
+
+    def _collect_metrics(self):
+        stats = self.roster.stats()
+        labels = {"cache": "roster"}
+        yield "bot_cache_hit_ratio", labels, stats["hit_ratio"]
+        yield "bot_cache_entries", labels, stats["cached"]
+        yield "bot_cache_misses_total", labels, stats["misses"]
+        yield "bot_roster_students", {}, stats["size"]
+        if self.verify_queue is not None:
+            queue = self.verify_queue.stats()
+            yield "bot_verify_queue_depth", {}, queue["depth"]
+            yield "bot_verify_queue_in_flight", {}, queue["in_flight"]
+            yield "bot_verify_queue_retries_total", {}, queue["retries"]
+            yield "bot_verify_queue_rejected_total", {}, queue["rejected"]
     
     @commands.Cog.listener()
     async def on_ready(self):
@@ -26,24 +87,61 @@ class Login(commands.Cog):
         await self.bot.change_presence(activity=discord.Game("verify using /verify"))
         
         # Check the cog's internal flag for syncing
-        if not self._synced: 
+        # (multi-process: commands are global, so only the process holding shard 0 syncs them)
+        if not self._synced and owns_shard_zero(self.bot): 
             try:
-                # --- OPTION B: GLOBAL SYNC (Slow, for production) ---
-                synced = await self.bot.tree.sync()
-                print(f"SyncCog: Globally synced {len(synced)} commands.")
+                if DEV_GUILD_SYNC:
+                    # --- OPTION A: GUILD SYNC (Fast, for development) ---
+                    guild = discord.Object(id=GUILD_ID)
+                    self.bot.tree.copy_global_to(guild=guild)
+                else:
+                    # --- OPTION B: GLOBAL SYNC (Slow, for production) ---
+                    guild = None
+                synced = await sync_if_changed(
+                    self.bot.tree, COMMAND_SYNC_STATE, self.bot.application_id, guild=guild, force=FORCE_COMMAND_SYNC)
+                if synced is not None:
+                    log.info("Synced %d commands (%s).", synced, f"guild {GUILD_ID}" if guild else "global")
                 
                 # Set the cog flag to prevent re-syncing on subsequent reloads
                 self._synced = True 
                 
             except Exception as e:
-                print(f"SyncCog: Failed to sync commands: {e}")
-        print(f"{__name__} is Loaded!")
+                log.error("Failed to sync commands: %s", e)
+        log.info("%s is Loaded!", __name__)
 
-    async def assign_verified_role(self,member: discord.Member,guild : discord.Guild,student_id:str,student_name:str) -> str:
+    async def assign_verified_role(self,member: discord.Member,guild : discord.Guild,student_id:str,student_name:str,done: dict | None = None) -> str:
+        """Adds the role and sets the nickname; edits already recorded in `done` by an earlier attempt are skipped."""
+        done = {} if done is None else done
         verified_role = guild.get_role(VERIFIED_ROLE_ID)
-        role_status = await self.assign_role(member,verified_role)
-        nick_status = await self.assign_name(member,student_id,student_name)
-        return f"\n**Verification Status** : {role_status} - {nick_status}"
+        edits = {}
+        if "role" not in done:
+            edits["role"] = self.assign_role(member,verified_role)
+        if "nick" not in done:
+            edits["nick"] = self.assign_name(member,student_id,student_name)
+        # The role and the nickname are separate endpoints, so both edits can run at once.
+        # return_exceptions: one failing must not leave the other running unobserved, and the
+        # edit that did succeed is recorded so a retry only repeats the failed one
+        results = await asyncio.gather(*edits.values(), return_exceptions=True)
+        error = None
+        for name, result in zip(edits, results):
+            if isinstance(result, BaseException):
+                error = error or result
+            else:
+                done[name] = result
+        if error is not None:
+            raise error
+        return f"\n**Verification Status** : {done['role']} - {done['nick']}"
+
+    async def _apply_verification(self, payload: dict, key: str):
+        """Sender for verify_queue: (ok, status message, retryable)."""
+        # 429s are handled inside discord.py (it waits on the bucket and retries, since the client sets
+        # no max_ratelimit_timeout), so only Discord 5xx errors come back here to be retried
+        payload.setdefault("done", {})   # kept on the job between attempts
+        try:
+            status = await self.assign_verified_role(**payload)
+        except discord.DiscordServerError as e:
+            return False, f"Discord error {e.status}, retrying...", True
+        return True, status, False
     
     async def assign_role(self, member: discord.Member, verified_role:discord.role) -> str:
         if not verified_role:
@@ -57,6 +155,8 @@ class Login(commands.Cog):
             return f"Role Assigned: `{verified_role.name}`."
         except discord.Forbidden:
             return "Role assignment failed: Bot lacks permissions/hierarchy."
+        except discord.DiscordServerError:
+            raise
         except Exception as e:
             return f"Role assignment failed: Error: {e}"
     
@@ -72,6 +172,8 @@ class Login(commands.Cog):
             return f"Nickname changed to {fullnick}."
         except discord.Forbidden:
             return "Nickname change failed: Bot lacks permissions/hierarchy."
+        except discord.DiscordServerError:
+            raise
         except Exception as e:
             return f"Nickname change failed: Error: {e}"
 
@@ -80,17 +182,22 @@ class Login(commands.Cog):
         student_id = "Your unique student id (IT faculty only!)"
     )
     async def verifyCommand(self, interaction: discord.Interaction, student_id: str):
+        with metrics.timer("bot_command_duration_ms", (("command", "/verify"),), inflight="bot_commands_in_flight"):
+            await self._verify(interaction, student_id)
+
+    async def _verify(self, interaction: discord.Interaction, student_id: str):
         if not student_id or len(student_id) < 8:
             return await interaction.response.send_message(
                 "**Error!**\nPlease input a Unique KMITL Student ID.",ephemeral=False)
         await interaction.response.defer(ephemeral=True)
 
-        print("Starting verification process...")
+        log.debug("Starting verification process...")
 
-        is_verified = self.isIT(student_id) and self.getName(student_id) is not None
-        student_name = self.getName(student_id).split(' ')[0]
+        full_name = await self.getName(student_id) if self.isIT(student_id) else None
+        is_verified = full_name is not None
+        student_name = full_name.split(' ')[0] if is_verified else ""
 
-        print(f"Verification attempt for ID: {student_id}, Verified: {is_verified}")
+        log.info("Verification attempt", extra={"student_id": student_id, "verified": is_verified})
 
         if is_verified:
             base_message = (
@@ -98,7 +205,8 @@ class Login(commands.Cog):
                 # f"Student ID `{student_id}` confirmed for IT Faculty (Code 07).\n"
             )
             if interaction.guild and isinstance(interaction.user, discord.Member):
-                role_status_message = await self.assign_verified_role(
+                role_status_message = await self.queue_verified_role(
+                    interaction,
                     member=interaction.user,
                     guild=interaction.guild,
                     student_id=student_id,
@@ -116,6 +224,29 @@ class Login(commands.Cog):
             response_message,
             ephemeral=True
         )
+
+    async def queue_verified_role(self, interaction: discord.Interaction, **payload) -> str:
+        """Runs assign_verified_role through verify_queue; repeated /verify by the same member with the same student ID shares one job."""
+        queue = self.verify_queue
+        key = f"verify-{payload['member'].id}-{payload['student_id']}"
+        try:
+            future = queue.submit(payload, key=key)
+        except QueueFull:
+            return "\n*Role assignment skipped: too many verifications right now, please run /verify again in a minute.*"
+
+        # Jobs still waiting once every idle worker has taken one (including ours)
+        position = queue.depth - (queue.worker_count - queue.in_flight)
+        if not future.done() and position > 0:
+            await interaction.followup.send(
+                f"⏳ Your ID is confirmed. You are #{position} in the queue for your role and nickname...",
+                ephemeral=True
+            )
+
+        ok, status = await future
+        if not ok:
+            return f"\n**Verification Status** : Failed to update your role and nickname: {status}"
+        return status
+
     def isIT(self,ID) -> bool:
         try:
             # Extracts digits 3 & 4 (index 2 and 3) and checks if the integer value is 7
@@ -127,12 +258,28 @@ class Login(commands.Cog):
             # If the slicing fails (IndexError) or conversion fails (ValueError),
             # the ID is invalid, so we return False.
             return False
-    def getName(self,ID) -> str:
-        # แบบไม่ดึงจาก database
-        if ID not in TMPDATA:
-            return None
-        return TMPDATA[ID]
-        # แบบดึงจาก database
+    async def getName(self,ID) -> str:
+        # แบบดึงจาก database (roster.csv -> data/roster.sqlite)
+        return await self.roster.lookup(ID)
+
+    @commands.command(name="roster")
+    @commands.has_permissions(administrator=True)
+    async def roster_cmd(self, ctx: commands.Context, action: str = None):
+        if action == "reload":
+            try:
+                count = await self.roster.reload()
+            except Exception as e:
+                return await ctx.send(f"❌ Roster reload failed, still using the previous list: {e}")
+            return await ctx.send(f"✅ Roster reloaded: {count} students.")
+
+        stats = self.roster.stats()
+        await ctx.send(
+            f"**Roster** `{ROSTER_CSV}`\n"
+            f"students: {stats['size']} / cached: {stats['cached']}\n"
+            f"hit: {stats['hits']} / miss: {stats['misses']} ({stats['hit_ratio']:.1%})\n"
+            f"reloads: {stats['reloads']}\n"
+            "Type `!roster reload` to re-import the CSV now."
+        )
 async def setup(bot):
     bot.synced = False
     await bot.add_cog(Login(bot))
\ No newline at end of file
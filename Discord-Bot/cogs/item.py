@@ -1,5 +1,8 @@
 import discord
 from discord.ext import commands
+import logging
+
+log = logging.getLogger(__name__)
 
 class testCommand(commands.Cog):
     def __init__(self,bot):
@@ -7,7 +10,7 @@ class testCommand(commands.Cog):
     
     @commands.Cog.listener()
     async def on_ready(self):
-        print(f"{__name__} is Loaded!")
+        log.info("%s is Loaded!", __name__)
     
     @commands.command()
     async def ping(self,ctx):
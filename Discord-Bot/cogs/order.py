@@ -2,135 +2,611 @@ import discord
 from discord.ext import commands
 import aiohttp
 import asyncio
+import contextlib
+import logging
+import math
+import os
 import re
+import time
+
+from utils.cache import TTLCache
+from utils.channel_state import ChannelStateStore
+from utils.circuit import CircuitBreaker, CircuitOpenError
+from utils.lookup import LookupIndex
+from utils.menu_images import MenuImageCache
+from utils.metrics import metrics
+from utils.order_tracker import DONE, PAID, OrderTracker
+from utils.sharding import sees_all_guilds
+from utils.shared_store import SharedStore
+from utils.submit_queue import QueueFull, SubmissionQueue
+from utils.throttle import DedupWindow, KeyedLocks, RateLimiter
+
+log = logging.getLogger(__name__)
 
 # --- ⚙️ ตั้งค่า ---
-BASE_API_URL = "http://localhost:8080" # 1. API ของคุณ
+BASE_API_URL = os.getenv("API_URL", "http://localhost:8080") # 1. API ของคุณ
 TICKET_CHANNEL_PREFIX = "ticket-"      # 2. คำนำหน้าช่องทิกเก็ต
-TICKET_TOOL_BOT_NAME = "Ticket Tool"   # 3. ชื่อบอทที่สร้างทิกเก็ต
+# 3. ID ของบอท Ticket Tool (เช็ค ID แทนชื่อ: เร็วกว่าและปลอมชื่อไม่ได้) เพิ่มได้ด้วย TICKET_TOOL_BOT_IDS="id1,id2"
+TICKET_TOOL_BOT_IDS = frozenset(
+    int(bot_id) for bot_id in os.getenv("TICKET_TOOL_BOT_IDS", "557628352828014614").split(",") if bot_id.strip()
+)
+TICKET_CHANNEL_CACHE_MAX = 10000       # จำนวนช่องที่จำผลว่าเป็นช่องทิกเก็ตหรือไม่
+
+# --- 🌐 ตั้งค่า Connection pool ไปยัง API ---
+HTTP_POOL_LIMIT = 100           # จำนวน connection สูงสุดทั้งหมด
+HTTP_POOL_LIMIT_PER_HOST = 30   # จำนวน connection สูงสุดต่อ host (backend มีแค่ host เดียว)
+HTTP_KEEPALIVE_TIMEOUT = 30     # (วินาที) เก็บ connection ที่ว่างไว้ใช้ซ้ำนานเท่าไร
+HTTP_DNS_CACHE_TTL = 300        # (วินาที) cache ผล DNS ของ host
+API_CONNECT_TIMEOUT = 3         # (วินาที) เวลารอเชื่อมต่อ backend
+API_READ_TIMEOUT = 10           # (วินาที) เวลารอข้อมูลจาก backend ระหว่างอ่าน response
+API_TOTAL_TIMEOUT = 15          # (วินาที) เวลารวมสูงสุดต่อ 1 request
+
+# --- 🔌 ตั้งค่า Circuit breaker ---
+BREAKER_FAILURE_THRESHOLD = 5   # ล้มเหลวติดกันกี่ครั้งถึงจะหยุดเรียก backend ชั่วคราว
+BREAKER_RESET_TIMEOUT = 15      # (วินาที) หยุดเรียกนานเท่าไรก่อนลองเรียกใหม่ (half-open)
+
+# --- 🗂️ ตั้งค่า Cache ---
+STORES_CACHE_TTL = 300          # (วินาที) อายุของรายชื่อร้านค้า
+MENU_CACHE_TTL = 60             # (วินาที) อายุของเมนูแต่ละร้าน (ร้านเพิ่ม/ลบเมนูผ่าน /store/product/add|remove)
+ALL_STORES_KEY = "all"          # key ของรายชื่อร้านค้าทั้งหมดใน stores_cache
+MENU_TEXT_LIMIT = 4000          # ความยาวสูงสุดของเมนูแบบข้อความ (embed description รับได้ 4096 ตัวอักษร)
+MENU_PREFETCH_CONCURRENCY = 8   # จำนวนร้านที่โหลดเมนูพร้อมกันตอน warm-up
+WARM_UP_PROGRESS_EVERY = 10     # log ความคืบหน้า warm-up (INFO) ทุก ๆ กี่ร้าน
+WARM_UP_PROGRESS_INTERVAL = 5   # (วินาที) หรือเมื่อไม่ได้ log มานานเท่านี้ (ร้านที่โหลดช้า)
+
+# --- 🧾 ตั้งค่าการสั่งหลายรายการ ---
+MAX_ORDER_ITEMS = 10            # จำนวนรายการ (ชื่อเมนู) สูงสุดต่อ !order
+MAX_ORDER_QUANTITY = 10         # จำนวนจานสูงสุดต่อรายการ
+
+# --- 🔔 ตั้งค่าการแจ้งสถานะออเดอร์ ---
+ORDER_POLL_MIN_INTERVAL = 5         # (วินาที) ตรวจถี่สุดเมื่อมีออเดอร์ใหม่/สถานะเพิ่งเปลี่ยน
+ORDER_POLL_MAX_INTERVAL = 60        # (วินาที) ตรวจห่างสุดเมื่อไม่มีอะไรเปลี่ยน
+ORDER_TRACK_MAX_AGE = 3 * 60 * 60   # (วินาที) เลิกติดตามออเดอร์ที่ค้างนานเกินนี้
+
+# --- 🎫 ตั้งค่า State ของช่องทิกเก็ต ---
+# โฟลเดอร์เก็บ state ทั้งหมด (ช่องทิกเก็ต, cache ร้านที่แชร์, รูปเมนู) เปลี่ยนได้ด้วย BOT_DATA_DIR (เช่นตอนทดสอบ)
+DATA_DIR = os.getenv("BOT_DATA_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CHANNEL_STATE_DB = os.path.join(DATA_DIR, "channel_states.sqlite")
+CHANNEL_STATE_MAX = 5000            # จำนวนช่องทิกเก็ตสูงสุดที่จำไว้ (เกินแล้วลบช่องที่ไม่ได้ใช้นานที่สุด)
+CHANNEL_STATE_TTL = 12 * 60 * 60    # (วินาที) ช่องที่ไม่ได้ใช้นานเกินนี้ถือว่าปิดไปแล้ว
+CHANNEL_STATE_FLUSH_INTERVAL = 5    # (วินาที) รวมการเปลี่ยนแปลงแล้วบันทึกลงไฟล์ทุก ๆ เท่านี้
+CHANNEL_STATE_TOUCH_INTERVAL = 60   # (วินาที) ช่องที่ยังใช้อยู่ ต่ออายุ (บันทึกเวลาใช้ล่าสุด) ไม่ถี่กว่านี้
+
+# --- 🧩 รันหลายโปรเซส (launcher.py) ---
+# แชร์รายชื่อร้าน/เมนูระหว่างโปรเซสผ่านไฟล์ SQLite: backend โดนเรียกครั้งเดียวต่อ TTL ไม่ใช่ครั้งละโปรเซส
+SHARED_STORE_ENABLED = os.getenv("BOT_SHARED_STORE", "0") == "1"
+SHARED_STORE_DB = os.path.join(os.path.dirname(CHANNEL_STATE_DB), "shared_cache.sqlite")
+
+# --- 🖼️ ตั้งค่ารูปเมนู (menu_url) ---
+# ลิงก์ไฟล์แนบของ Discord หมดอายุ: เก็บรูปไว้ในเครื่อง แล้วอัปโหลดใหม่เมื่อลิงก์เดิมใช้ไม่ได้
+MENU_IMAGE_DIR = os.path.join(os.path.dirname(CHANNEL_STATE_DB), "menu_images")
+MENU_IMAGE_MAX_BYTES = 8 * 1024 * 1024  # ขนาดรูปเมนูสูงสุดที่ดาวน์โหลด (ต้องอัปโหลดกลับเข้า Discord ได้)
+MENU_IMAGE_EXPIRY_MARGIN = 10 * 60      # (วินาที) ถือว่าลิงก์หมดอายุแล้วถ้าเหลือเวลาน้อยกว่านี้
+# ช่องที่ใช้อัปโหลดรูปเมนูใหม่ (URL ของไฟล์แนบถูกใช้ซ้ำทุกช่องทิกเก็ต) 0 = แนบรูปไปกับข้อความ !menu แทน
+MENU_IMAGE_CHANNEL_ID = int(os.getenv("MENU_IMAGE_CHANNEL_ID", "0"))
+
+# --- 📮 ตั้งค่าคิวส่งออเดอร์ ---
+ORDER_QUEUE_WORKERS = 8         # จำนวน POST /orders/add ที่ส่งพร้อมกันได้ (ทั้งบอท)
+ORDER_QUEUE_MAX_DEPTH = 200     # จำนวนจานที่รอส่งในคิวได้สูงสุด
+ORDER_MAX_ATTEMPTS = 5          # จำนวนครั้งที่ลองส่งต่อ 1 จาน (รวมครั้งแรก)
+ORDER_RETRY_BASE_DELAY = 0.5    # (วินาที) backoff เริ่มต้น (เพิ่มเป็น 2 เท่าทุกครั้ง + jitter)
+ORDER_RETRY_MAX_DELAY = 8.0     # (วินาที) backoff สูงสุด
+
+# --- 🚦 ตั้งค่ากันสแปม/กดซ้ำ ---
+COMMAND_DEDUP_WINDOW = 10       # (วินาที) คนเดิมสั่งเมนูเดิม (หรือขอเมนูร้านเดิม) ในช่องเดิมซ้ำภายในเวลานี้ = กดซ้ำ ไม่ส่งอีก
+USER_COMMAND_RATE = 0.5         # (token/วินาที) อัตราที่แต่ละคนได้ token คืน (!menu / !order ครั้งละ 1 token)
+USER_COMMAND_BURST = 5          # จำนวนคำสั่งที่พิมพ์ติดกันได้ก่อนโดนจำกัด
+SPAM_NOTICE_INTERVAL = 30       # (วินาที) เตือน "พิมพ์ถี่เกินไป"/"สั่งซ้ำ" คนละครั้งต่อช่วงนี้ (ที่เหลือไม่ตอบ)
 # ---------------------------------
 
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    สร้าง ClientSession ที่ใช้ connection pool ร่วมกัน (keep-alive)
+    แทนการเปิด session ใหม่ (= TCP connection ใหม่) ทุกครั้งที่เรียก API
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=API_TOTAL_TIMEOUT,
+        connect=API_CONNECT_TIMEOUT,
+        sock_read=API_READ_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def _done(result) -> asyncio.Future:
+    """Future ที่มีผลลัพธ์แล้ว (ใช้แทนงานที่ไม่ได้เข้าคิว)"""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
+
 class OrderCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
         self.api_base_url = BASE_API_URL
         self.ticket_prefix = TICKET_CHANNEL_PREFIX
+        self.ticket_tool_ids = TICKET_TOOL_BOT_IDS
+        # { channel_id: เป็นช่องทิกเก็ตไหม } ล้างเมื่อช่องถูกเปลี่ยนชื่อ/ลบ
+        self._ticket_channels: dict[int, bool] = {}
         
         # --- ตัวแปรสำหรับเก็บข้อมูล ---
         
-        # 1. (แก้ไข) เก็บรายชื่อและ URL เมนูของร้านค้า
-        #    { 1: { "name": "โคเจ", "menu_url": "http://..." } }
-        self.stores_cache = {}
+        # 1. (แก้ไข) เก็บรายชื่อและ URL เมนูของร้านค้า (มีอายุ STORES_CACHE_TTL)
+        #    stores_cache[ALL_STORES_KEY] = { 1: { "name": "โคเจ", "menu_url": "http://..." } }
+        self.stores_cache = TTLCache(self._load_stores_shared, ttl=STORES_CACHE_TTL, name="stores")
         
-        # 2. เก็บเมนู (products) ของร้านที่เคยโหลดแล้ว
-        self.menu_cache = {}
+        # 2. เก็บเมนู (products) ของร้านที่เคยโหลดแล้ว (มีอายุ MENU_CACHE_TTL)
+        #    menu_cache[store_id] = { "ชื่อเมนู": { "id": ..., "price": ..., "original_name": ... } }
+        self.menu_cache = TTLCache(self._load_menu_shared, ttl=MENU_CACHE_TTL, name="menu")
+
+        # 2.1 (รันหลายโปรเซส) cache ชั้นที่ 2 ที่ทุกโปรเซสใช้ร่วมกัน
+        self.shared_store = SharedStore(SHARED_STORE_DB) if SHARED_STORE_ENABLED else None
+
+        # 2.2 รูปเมนูของแต่ละร้าน (ไฟล์ในเครื่อง + URL ที่อัปโหลดใหม่เมื่อ menu_url หมดอายุ)
+        self.menu_images = MenuImageCache(
+            MENU_IMAGE_DIR,
+            self._download_menu_image,
+            upload=self._upload_menu_image if MENU_IMAGE_CHANNEL_ID else None,
+            expiry_margin=MENU_IMAGE_EXPIRY_MARGIN,
+        )
         
-        # 3. เก็บว่าช่องทิกเก็ตนี้ "เลือกร้านอะไรอยู่"
-        self.channel_states = {}
+        # 3. เก็บว่าช่องทิกเก็ตนี้ "เลือกร้านอะไรอยู่" (จำกัดขนาด + บันทึกลงไฟล์ กู้คืนได้หลังรีสตาร์ท)
+        self.channel_states = ChannelStateStore(
+            CHANNEL_STATE_DB,
+            max_size=CHANNEL_STATE_MAX,
+            ttl=CHANNEL_STATE_TTL,
+            flush_interval=CHANNEL_STATE_FLUSH_INTERVAL,
+            touch_interval=CHANNEL_STATE_TOUCH_INTERVAL,
+        )
+
+        # 4. session ที่ใช้ร่วมกันทั้ง cog (สร้างใน cog_load, ปิดใน cog_unload)
+        self.session: aiohttp.ClientSession | None = None
+        self.order_queue: SubmissionQueue | None = None
+
+        # poller ตัวเดียวที่ตรวจสถานะออเดอร์ทุกร้าน แล้วแจ้งในช่องทิกเก็ตเมื่อสถานะเปลี่ยน
+        self.order_tracker = OrderTracker(
+            self._fetch_store_orders,
+            self._notify_order_changes,
+            min_interval=ORDER_POLL_MIN_INTERVAL,
+            max_interval=ORDER_POLL_MAX_INTERVAL,
+            max_age=ORDER_TRACK_MAX_AGE,
+        )
 
-        self.store_fetch_task = self.bot.loop.create_task(self.fetch_all_stores())
+        # ถ้า backend ล่ม จะหยุดเรียกชั่วคราว (fail fast) และตอบ !menu จาก cache แทน
+        self.breaker = CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_TIMEOUT,
+            name="ระบบร้านค้า (backend)",
+        )
+
+        # 5. ดัชนีค้นหาชื่อร้าน/เมนู (สร้างครั้งเดียวต่อ version ของข้อมูลใน cache)
+        #    { ("menu", store_id): (version, LookupIndex) }
+        self._lookup_indexes = {}
+
+        # 6. embed เมนูที่ render ไว้แล้ว { store_id: ((version ร้าน, version เมนู), discord.Embed) }
+        self._menu_embeds = {}
+
+        # 7. warm-up: โหลดรายชื่อร้าน + เมนูทุกร้านไว้ก่อนทิกเก็ตแรกจะมา (เริ่มใน cog_load)
+        self.warmed_up = asyncio.Event()
+        self.warm_up_task: asyncio.Task | None = None
+
+        # 8. กันสแปม: คำสั่งในช่องเดียวกันทำทีละคำสั่ง, ทิ้งคำสั่งที่กดซ้ำ, จำกัดความถี่ต่อคน (token bucket)
+        self.channel_locks = KeyedLocks()
+        self.recent_commands = DedupWindow(COMMAND_DEDUP_WINDOW)
+        self.user_limiter = RateLimiter(USER_COMMAND_RATE, USER_COMMAND_BURST)
+        self.spam_notices = DedupWindow(SPAM_NOTICE_INTERVAL)
+
+    async def cog_load(self):
+        self.session = create_http_session()
+        metrics.register_collector("order", self._collect_metrics)
+        restored = await self.channel_states.load()
+        self.channel_states.start()
+        log.info("กู้คืน state ของช่องทิกเก็ต %d ช่อง", restored)
+        images = await self.menu_images.load()
+        log.info("มีรูปเมนูในเครื่อง %d รูป", images)
+        self.order_queue = SubmissionQueue(
+            self._post_order,
+            workers=ORDER_QUEUE_WORKERS,
+            max_depth=ORDER_QUEUE_MAX_DEPTH,
+            max_attempts=ORDER_MAX_ATTEMPTS,
+            base_delay=ORDER_RETRY_BASE_DELAY,
+            max_delay=ORDER_RETRY_MAX_DELAY,
+            # circuit เปิดอยู่: รอจนถึง half-open ก่อนลองจานถัดไป (บวก jitter ไม่ให้ทุกจานมาพร้อมกัน)
+            retry_delay=self.breaker.retry_after,
+        )
+        self.order_queue.start()
+        self.order_tracker.start()
+        self.warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def cog_unload(self):
+        metrics.unregister_collector("order")
+        if self.warm_up_task is not None:
+            self.warm_up_task.cancel()
+        await self.stores_cache.close()
+        await self.menu_cache.close()
+        if self.order_queue is not None:
+            await self.order_queue.close()
+        await self.order_tracker.close()
+        await self.channel_states.close()
+        await self.menu_images.close()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        ctx.metrics_timer = metrics.timer(
+            "bot_command_duration_ms", (("command", f"!{ctx.command.name}"),), inflight="bot_commands_in_flight"
+        )
+        ctx.metrics_timer.__enter__()
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        timer = getattr(ctx, "metrics_timer", None)
+        if timer is not None:
+            timer.__exit__(None, None, None)
+
+    def _collect_metrics(self):
+        """ค่าที่อ่านสด ๆ ตอนแสดงสถิติ (ไม่มีต้นทุนระหว่างทำงานปกติ)"""
+        for cache in (self.stores_cache, self.menu_cache):
+            stats = cache.stats()
+            labels = {"cache": cache.name}
+            yield "bot_cache_hit_ratio", labels, stats["hit_ratio"]
+            yield "bot_cache_entries", labels, stats["entries"]
+            yield "bot_cache_misses_total", labels, stats["misses"]
+            yield "bot_cache_refreshes_total", labels, stats["refreshes"]
+        if self.order_queue is not None:
+            queue = self.order_queue.stats()
+            yield "bot_order_queue_depth", {}, queue["depth"]
+            yield "bot_order_queue_in_flight", {}, queue["in_flight"]
+            yield "bot_order_queue_retries_total", {}, queue["retries"]
+            yield "bot_order_queue_rejected_total", {}, queue["rejected"]
+        yield "bot_orders_tracked", {}, self.order_tracker.outstanding
+        yield "bot_ticket_channels", {}, len(self.channel_states)
+        images = self.menu_images.stats()
+        yield "bot_menu_images", {}, images["images"]
+        for event in ("downloads", "disk_hits", "uploads", "failures"):
+            yield "bot_menu_image_events_total", {"event": event}, images[event]
+        yield "bot_backend_circuit_open", {}, 1 if self.breaker.is_open else 0
+        yield "bot_commands_deduplicated_total", {}, self.recent_commands.duplicates
+        yield "bot_commands_throttled_total", {}, self.user_limiter.throttled
+        yield "bot_ticket_channels_busy", {}, len(self.channel_locks)
+
+    @contextlib.asynccontextmanager
+    async def api_request(self, method: str, path: str, **kwargs):
+        """
+        เรียก backend ผ่าน circuit breaker (ทุก request ของ cog ต้องผ่านตรงนี้)
+        raise CircuitOpenError ทันทีถ้า backend ถูกพักไว้
+        เชื่อมต่อไม่ได้ / timeout / 5xx นับเป็นความล้มเหลว
+        """
+        self.breaker.check()
+        recorded = False
+        status = "error"
+        started = time.perf_counter()
+        metrics.add("bot_backend_in_flight", 1)
+        try:
+            try:
+                response = await self.session.request(method, f"{self.api_base_url}{path}", **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.breaker.record_failure()
+                recorded = True
+                raise
+            status = str(response.status)
+            try:
+                if response.status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                recorded = True
+                yield response
+            finally:
+                response.release()
+        finally:
+            if not recorded:
+                # ถูก cancel / error อื่นก่อนรู้ผล: คืนสิทธิ์ probe ไม่ให้ half-open ค้าง
+                self.breaker.release()
+            metrics.add("bot_backend_in_flight", -1)
+            metrics.observe(
+                "bot_backend_request_duration_ms",
+                (time.perf_counter() - started) * 1000,
+                (("endpoint", f"{method} {path}"), ("status", status)),
+            )
 
     # -----------------------------------------------------------------
     # (แก้ไข) 1. ฟังก์ชันดึง "รายชื่อร้านค้าทั้งหมด"
     # -----------------------------------------------------------------
     async def fetch_all_stores(self):
         """
-        (API: GET /store) ดึงรายชื่อร้านค้าทั้งหมดมาเก็บไว้ใน cache
+        (API: GET /store) ดึงรายชื่อร้านค้าทั้งหมด (ผ่าน cache)
+        คืนค่า { store_id: { "name": ..., "menu_url": ... } } หรือ {} ถ้าดึงไม่ได้
         """
         await self.bot.wait_until_ready()
-        endpoint = f"{self.api_base_url}/store" #
-        
+        return await self.stores_cache.get(ALL_STORES_KEY) or {}
+
+    async def _load_shared(self, namespace: str, key, ttl: float, loader, decode=None):
+        """อ่านจาก shared_store ก่อน (ถ้าเปิดไว้) ไม่มีหรือเก่าเกิน ttl ค่อยเรียก loader แล้วเขียนกลับ"""
+        if self.shared_store is None:
+            return await loader(key)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(endpoint) as response:
-                    if response.status == 200:
-                        stores_list = await response.json()
-                        self.stores_cache.clear()
-                        for store in stores_list:
-                            # (แก้ไข) เก็บ cả ชื่อ และ menu_url
-                            self.stores_cache[store.get("store_id")] = {
-                                "name": store.get("name"),
-                                "menu_url": store.get("menu_url") #
-                            }
-                        print(f"[OrderCog] ✅ โหลดรายชื่อร้านค้าสำเร็จ: {len(self.stores_cache)} ร้าน")
-                    else:
-                        print(f"❌ [OrderCog] ไม่สามารถดึงรายชื่อร้านค้าได้ (Status: {response.status})")
+            cached = await self.shared_store.get(namespace, key, max_age=ttl)
         except Exception as e:
-            print(f"❌ [OrderCog] เกิด Error ตอนดึงรายชื่อร้านค้า: {e}")
+            log.warning("อ่าน shared cache (%s) ไม่สำเร็จ: %s", namespace, e)
+            cached = None
+        if cached is not None:
+            return decode(cached) if decode else cached
+
+        value = await loader(key)
+        if value is not None:
+            try:
+                await self.shared_store.put(namespace, key, value)
+            except Exception as e:
+                log.warning("เขียน shared cache (%s) ไม่สำเร็จ: %s", namespace, e)
+        return value
+
+    async def _load_stores_shared(self, key):
+        # JSON เก็บ key ของ dict เป็น str ต้องแปลง store_id กลับเป็น int
+        return await self._load_shared(
+            "stores", key, STORES_CACHE_TTL, self._load_all_stores,
+            lambda stores: {int(store_id): data for store_id, data in stores.items()}
+        )
+
+    async def _load_menu_shared(self, store_id: int):
+        return await self._load_shared("menu", store_id, MENU_CACHE_TTL, self._load_store_menu)
+
+    async def _download_menu_image(self, url: str) -> tuple[bytes, str]:
+        """downloader ของ menu_images: ดาวน์โหลดรูปเมนู (ไม่เกิน MENU_IMAGE_MAX_BYTES)"""
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            if (response.content_length or 0) > MENU_IMAGE_MAX_BYTES:
+                raise ValueError(f"รูปเมนูใหญ่เกิน {MENU_IMAGE_MAX_BYTES} bytes")
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body += chunk
+                if len(body) > MENU_IMAGE_MAX_BYTES:
+                    raise ValueError(f"รูปเมนูใหญ่เกิน {MENU_IMAGE_MAX_BYTES} bytes")
+            return bytes(body), response.content_type
+
+    async def _upload_menu_image(self, path: str, filename: str) -> str:
+        """uploader ของ menu_images: ส่งรูปเข้าช่อง MENU_IMAGE_CHANNEL_ID แล้วคืน URL ของไฟล์แนบ"""
+        channel = self.bot.get_partial_messageable(MENU_IMAGE_CHANNEL_ID)
+        message = await channel.send(file=discord.File(path, filename=filename))
+        return message.attachments[0].url
+
+    async def _load_all_stores(self, _key=None):
+        """loader ของ stores_cache: ยิง API จริง คืน None ถ้าไม่สำเร็จ"""
+        try:
+            async with self.api_request("GET", "/store") as response:
+                if response.status == 200:
+                    stores_list = await response.json()
+                    stores = {}
+                    for store in stores_list:
+                        # (แก้ไข) เก็บ cả ชื่อ และ menu_url
+                        stores[store.get("store_id")] = {
+                            "name": store.get("name"),
+                            "menu_url": store.get("menu_url") #
+                        }
+                    log.info("โหลดรายชื่อร้านค้าสำเร็จ: %d ร้าน", len(stores))
+                    return stores
+                else:
+                    log.error("ไม่สามารถดึงรายชื่อร้านค้าได้ (Status: %s)", response.status)
+                    return None
+        except Exception as e:
+            log.error("เกิด Error ตอนดึงรายชื่อร้านค้า: %s", e)
+            return None
+
+    async def warm_up(self):
+        """
+        โหลดรายชื่อร้าน แล้วโหลดเมนูของทุกร้านพร้อมกัน (จำกัดด้วย MENU_PREFETCH_CONCURRENCY)
+        ร้านที่โหลดไม่สำเร็จจะไม่ขวางร้านอื่น และจะถูกโหลดใหม่ตอนมีคนเรียก !menu
+        """
+        await self.bot.wait_until_ready()
+
+        # ลบ state ของช่องที่ถูกลบไปตอนบอทออฟไลน์
+        # (ถ้าโปรเซสนี้ถือแค่บาง shard ช่องที่มองไม่เห็นอาจเป็นของโปรเซสอื่น: แค่ไม่โหลดไว้ ไม่ลบจากไฟล์)
+        pruned = self.channel_states.prune(
+            lambda channel_id: self.bot.get_channel(channel_id) is not None,
+            forget_only=not sees_all_guilds(self.bot),
+        )
+        if pruned:
+            log.info("ล้าง State ของช่องที่ไม่มีอยู่แล้ว %d ช่อง", pruned)
+
+        started = time.perf_counter()
+        stores = await self.fetch_all_stores()
+        if not stores:
+            log.error("warm-up: ไม่สามารถดึงรายชื่อร้านค้าได้, ข้ามการโหลดเมนูล่วงหน้า")
+            self.warmed_up.set()
+            return
+
+        semaphore = asyncio.Semaphore(MENU_PREFETCH_CONCURRENCY)
+        total = len(stores)
+        finished = 0
+        failed = []
+        last_progress = started
+        log.info("warm-up: เริ่มโหลดเมนู %d ร้าน", total)
+
+        async def prefetch(store_id):
+            nonlocal finished, last_progress
+            async with semaphore:
+                try:
+                    menu = await self.menu_cache.get(store_id)
+                    if menu is not None:
+                        self.menu_index(store_id)
+                        self.menu_embed(store_id)
+                    # เก็บรูปเมนูไว้ในเครื่องตั้งแต่ลิงก์ยังใช้ได้
+                    if stores[store_id].get("menu_url"):
+                        await self.menu_images.fetch(stores[store_id]["menu_url"])
+                except Exception as e:
+                    log.error("warm-up: โหลดเมนูร้าน ID %s ไม่สำเร็จ: %s", store_id, e)
+                    menu = None
+            finished += 1
+            if menu is None:
+                failed.append(store_id)
+            log.debug("warm-up %d/%d (ร้าน ID %s)", finished, total, store_id)
+            now = time.perf_counter()
+            if finished < total and (finished % WARM_UP_PROGRESS_EVERY == 0 or now - last_progress >= WARM_UP_PROGRESS_INTERVAL):
+                last_progress = now
+                log.info("warm-up: โหลดเมนูแล้ว %d/%d ร้าน (ไม่สำเร็จ %d)", finished, total, len(failed))
+
+        await asyncio.gather(*(prefetch(store_id) for store_id in stores))
+
+        elapsed = time.perf_counter() - started
+        self.warmed_up.set()
+        log.info(
+            "warm-up เสร็จใน %.2f วินาที: โหลดเมนูสำเร็จ %d/%d ร้าน%s",
+            elapsed, total - len(failed), total, f" (ไม่สำเร็จ: {failed})" if failed else ""
+        )
 
     # -----------------------------------------------------------------
     # 2. ฟังก์ชันดึง "เมนูของร้านที่เลือก"
     # -----------------------------------------------------------------
     async def fetch_store_menu(self, store_id: int):
         """
-        (API: GET /store/product) ดึงเมนูของร้านที่ระบุ
+        (API: GET /store/product) ดึงเมนูของร้านที่ระบุ (ผ่าน cache)
         """
-        if store_id in self.menu_cache:
-            return self.menu_cache[store_id]
-            
-        endpoint = f"{self.api_base_url}/store/product?store_id={store_id}" #
-        
+        return await self.menu_cache.get(store_id)
+
+    async def _load_store_menu(self, store_id: int):
+        """loader ของ menu_cache: ยิง API จริง คืน None ถ้าไม่สำเร็จ"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(endpoint) as response:
-                    if response.status == 200:
-                        products_list = await response.json()
-                        new_menu = {}
-                        for item in products_list:
-                            food_name = item.get("name")
-                            if food_name:
-                                new_menu[food_name.lower().strip()] = {
-                                    "id": item.get("product_id"),
-                                    "price": item.get("price"),
-                                    "original_name": food_name
-                                }
-                        self.menu_cache[store_id] = new_menu
-                        print(f"[OrderCog] ✅ โหลดเมนู (products) ร้าน ID {store_id} สำเร็จ")
-                        return new_menu
-                    else:
-                        print(f"❌ [OrderCog] ไม่สามารถดึงเมนู (products) ร้าน ID {store_id} (Status: {response.status})")
-                        return None
+            async with self.api_request("GET", "/store/product", params={"store_id": store_id}) as response:
+                if response.status == 200:
+                    products_list = await response.json()
+                    new_menu = {}
+                    for item in products_list:
+                        food_name = item.get("name")
+                        if food_name:
+                            new_menu[food_name.lower().strip()] = {
+                                "id": item.get("product_id"),
+                                "price": item.get("price"),
+                                "original_name": food_name
+                            }
+                    log.debug("โหลดเมนู (products) ร้าน ID %s สำเร็จ", store_id)
+                    return new_menu
+                else:
+                    log.error("ไม่สามารถดึงเมนู (products) ร้าน ID %s (Status: %s)", store_id, response.status)
+                    return None
         except Exception as e:
-            print(f"❌ [OrderCog] เกิด Error ตอนดึงเมนู (products): {e}")
+            log.error("เกิด Error ตอนดึงเมนู (products): %s", e)
             return None
 
+    def store_index(self) -> LookupIndex:
+        """ดัชนีชื่อร้าน -> store_id จาก stores_cache ปัจจุบัน"""
+        return self._cached_index(
+            self.stores_cache, ALL_STORES_KEY, ("stores",),
+            lambda stores: ((data["name"], store_id) for store_id, data in stores.items() if data.get("name"))
+        )
+
+    def menu_index(self, store_id: int) -> LookupIndex:
+        """ดัชนีชื่อเมนู -> รายละเอียดเมนู ของร้านที่ระบุ"""
+        return self._cached_index(
+            self.menu_cache, store_id, ("menu", store_id),
+            lambda menu: ((item["original_name"], item) for item in menu.values())
+        )
+
+    def _cached_index(self, cache: TTLCache, cache_key, index_key, entries) -> LookupIndex:
+        version = cache.version(cache_key)
+        cached = self._lookup_indexes.get(index_key)
+        if cached is None or cached[0] != version:
+            cached = (version, LookupIndex(entries(cache.peek(cache_key) or {})))
+            self._lookup_indexes[index_key] = cached
+        return cached[1]
+
+    def did_you_mean(self, suggestions) -> str:
+        """ข้อความ "คุณหมายถึง ... ?" จากผลของ LookupIndex.suggest (หรือ "" ถ้าไม่มี)"""
+        if not suggestions:
+            return ""
+        names = ", ".join(f"**{name}**" for name, _ in suggestions)
+        return f"\n🤔 คุณหมายถึง: {names} ?"
+
     # -----------------------------------------------------------------
     # 3. ฟังก์ชันแยก "ชื่อเมนู" และ "หมายเหตุ"
     # -----------------------------------------------------------------
     def parse_order_string(self, text: str):
-        pattern = r"(.*?)\s*\((.*?)\)$"
-        match = re.search(pattern, text)
-        
-        if match:
-            menu_name = match.group(1).strip()
-            note = match.group(2).strip()
-            return menu_name, note
-        else:
-            menu_name = text.strip()
-            return menu_name, None
+        """
+        แยก "!order" ที่อาจมีหลายรายการ (คั่นด้วย , หรือขึ้นบรรทัดใหม่)
+        แต่ละรายการเป็น "ชื่อเมนู [xจำนวน] [(หมายเหตุ)]" เช่น
+            "ข้าวมันไก่ x2, ข้าวขาหมู (ไม่เผ็ด)"
+        คืนค่า [(ชื่อเมนู, จำนวน, หมายเหตุ หรือ None), ...]
+        """
+        items = []
+        for part in self._split_order_items(text):
+            note = None
+            match = re.search(r"\((.*?)\)\s*$", part)
+            if not match:
+                # รองรับ "ชื่อ (หมายเหตุ) x2" ด้วย
+                match = re.search(r"\((.*?)\)(?=\s*[xX×*]\s*\d+\s*$)", part)
+            if match:
+                note = match.group(1).strip() or None
+                part = (part[:match.start()] + part[match.end():]).strip()
+
+            quantity = 1
+            # x ต้องไม่ติดกับตัวอักษรอังกฤษ/ตัวเลข ไม่งั้น "Pepsi Max 2" จะกลายเป็น ("Pepsi Ma", 2)
+            # และ "Mix2" เป็น ("Mi", 2) (× กับ * ไม่กำกวม ติดกับชื่อได้)
+            match = (
+                re.search(r"(?:(?<![A-Za-z0-9])[xX]|[×*])\s*(\d+)$", part)
+                or re.match(r"^(\d+)\s*(?:[xX](?![A-Za-z0-9])|[×*])\s*", part)
+            )
+            if match:
+                quantity = int(match.group(1))
+                part = (part[:match.start()] + part[match.end():]).strip()
+
+            if part:
+                items.append((part, quantity, note))
+        return items
+
+    def _split_order_items(self, text: str):
+        """แยกด้วย , หรือขึ้นบรรทัดใหม่ ยกเว้นที่อยู่ในวงเล็บ (หมายเหตุ)"""
+        parts, current, depth = [], [], 0
+        for char in text:
+            if char == "(":
+                depth += 1
+            elif char == ")" and depth:
+                depth -= 1
+            elif char in ",\n" and depth == 0:
+                parts.append("".join(current).strip())
+                current = []
+                continue
+            current.append(char)
+        parts.append("".join(current).strip())
+        return [part for part in parts if part]
 
     # -----------------------------------------------------------------
     # (แก้ไข) 4. Listener: ทำงานเมื่อเปิดทิกเก็ต (Requirement 1)
     # -----------------------------------------------------------------
+    def is_ticket_channel(self, channel) -> bool:
+        """ช่องนี้เป็นช่องทิกเก็ตไหม (จำผลไว้ต่อช่อง ไม่ต้องเทียบชื่อทุกข้อความ)"""
+        is_ticket = self._ticket_channels.get(channel.id)
+        if is_ticket is None:
+            if len(self._ticket_channels) >= TICKET_CHANNEL_CACHE_MAX:
+                self._ticket_channels.clear()
+            is_ticket = self._ticket_channels[channel.id] = getattr(channel, "name", "").startswith(self.ticket_prefix)
+        return is_ticket
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if message.author == self.bot:
+        # fast-path: ข้อความเกือบทั้งหมดในเซิร์ฟเวอร์มาจากคน จบตั้งแต่บรรทัดแรก
+        author = message.author
+        if not author.bot or author.id not in self.ticket_tool_ids or not message.embeds:
             return
 
-        if message.author.bot and message.author.name == TICKET_TOOL_BOT_NAME and message.embeds:
+        if self.is_ticket_channel(message.channel):
             
-            if not self.stores_cache:
+            if ALL_STORES_KEY not in self.stores_cache:
                 await message.channel.send("🔄 กำลังโหลดรายชื่อร้านค้าสักครู่...")
-                await self.fetch_all_stores()
 
-            if not self.stores_cache:
+            stores = await self.fetch_all_stores()
+            if not stores:
                 await message.channel.send("❌ ขออภัย, ไม่สามารถติดต่อ API เพื่อดึงรายชื่อร้านค้าได้")
                 return
 
             # (แก้ไข) สร้าง List รายชื่อร้านจาก cache ใหม่
             store_list_str = ""
-            for store_id, store_data in self.stores_cache.items():
+            for store_id, store_data in stores.items():
                 store_list_str += f"• **{store_data['name']}**\n"
             
             response_message = (
@@ -140,12 +616,6 @@ class OrderCog(commands.Cog):
             )
             
             await message.channel.send(response_message)
-            return
-
-        if message.author.bot:
-            return
-            
-        pass
 
     # -----------------------------------------------------------------
     # (แก้ไข) 5. คำสั่ง !menu (Requirement 2)
@@ -153,46 +623,99 @@ class OrderCog(commands.Cog):
     @commands.command(name="menu")
     async def menu_cmd(self, ctx: commands.Context, *, store_name: str = None):
         
-        if not ctx.channel.name.startswith(self.ticket_prefix):
+        if not self.is_ticket_channel(ctx.channel):
             return
 
         if store_name is None:
             await ctx.send("กรุณาระบุชื่อร้านครับ. เช่น `!menu โคเจ`")
             return
-            
+
+        if await self.throttled(ctx):
+            return
+
+        # คำสั่งในช่องเดียวกันทำทีละคำสั่ง (!order ที่ตามมาจะเห็นร้านที่เลือกล่าสุดเสมอ)
+        async with self.channel_locks.lock(ctx.channel.id):
+            await self._show_menu(ctx, store_name)
+
+    async def _show_menu(self, ctx: commands.Context, store_name: str):
         # (แก้ไข) ค้นหาร้านจาก cache ใหม่
-        found_store = None
-        search_name = store_name.lower().strip()
+        stores = await self.fetch_all_stores()
+        index = self.store_index()
+        store_id = index.find(store_name)
         
-        for store_id, store_data in self.stores_cache.items():
-            if search_name == store_data['name'].lower():
-                found_store = {
-                    "id": store_id, 
-                    "name": store_data['name'],
-                    "menu_url": store_data.get('menu_url') # ดึง URL รูปเมนู
-                }
-                break
-        
-        if not found_store:
-            await ctx.send(f"❌ ไม่พบร้านอาหารชื่อ: `{store_name}`")
+        if store_id is None or store_id not in stores:
+            await ctx.send(f"❌ ไม่พบร้านอาหารชื่อ: `{store_name}`" + self.did_you_mean(index.suggest(store_name)))
             return
             
-        store_id = found_store["id"]
-        store_name = found_store["name"]
-        menu_url = found_store.get("menu_url") # นี่คือลิงก์รูปภาพ
+        # ขอเมนูร้านเดิมซ้ำทั้งที่ช่องนี้เลือกร้านนี้อยู่แล้ว (กดซ้ำ) -> ไม่ส่งเมนูซ้ำ
+        current = self.channel_states.get(ctx.channel.id)
+        if self.recent_commands.seen((ctx.channel.id, ctx.author.id, "menu", store_id)) and current and current.store_id == store_id:
+            return
+
+        store_name = stores[store_id]["name"]
+        menu_url = stores[store_id].get("menu_url") # นี่คือลิงก์รูปภาพ
 
         # "ล็อก" ช่องนี้ไว้กับร้านนี้
-        self.channel_states[ctx.channel.id] = {"store_id": store_id, "store_name": store_name}
+        self.channel_states.set(ctx.channel.id, store_id, store_name)
         
         # (สำคัญ) โหลด "รายการสินค้า" (products) ไว้ใน cache เสมอ
         # เพื่อให้คำสั่ง !order ทำงานได้
-        menu_data = await self.fetch_store_menu(store_id)
+        await self.fetch_store_menu(store_id)
 
-        # --- (บล็อกแก้ไขหลัก) ---
+        # ใช้ embed ที่ render ไว้แล้ว (render ใหม่เฉพาะเมื่อข้อมูลร้าน/เมนูเปลี่ยน)
+        embed = self.menu_embed(store_id)
+        if embed is None:
+            await ctx.send(f"❌ ขออภัย, ไม่สามารถดึงเมนูร้าน **{store_name}** ได้ในขณะนี้")
+            return
+
+        # รูปเมนู: ลิงก์เดิมหมดอายุแล้วใช้รูปในเครื่องแทน (URL ที่อัปโหลดใหม่ หรือแนบไฟล์ไปกับข้อความ)
+        file = None
+        if menu_url:
+            image_url, attach_path = await self.menu_images.resolve(menu_url)
+            if attach_path is not None:
+                file = discord.File(attach_path, filename=os.path.basename(attach_path))
+                embed = embed.copy()
+                embed.set_image(url=f"attachment://{file.filename}")
+            elif image_url is None:
+                # ไม่มีรูปที่ใช้ได้เลย: แสดงเมนูแบบข้อความแทนรูปที่เสีย
+                embed = self._render_menu_embed(stores[store_id], self.menu_cache.peek(store_id), with_image=False) or embed
+            elif image_url != menu_url:
+                embed = embed.copy()
+                embed.set_image(url=image_url)
+
+        # (degraded mode) backend ล่มอยู่: เมนูที่แสดงมาจาก cache ล่าสุด
+        if self.breaker.is_open:
+            embed = embed.copy()
+            embed.set_footer(text="⚠️ ระบบร้านค้าขัดข้องชั่วคราว: แสดงเมนูล่าสุดที่บันทึกไว้ และยังสั่งอาหารไม่ได้ในขณะนี้")
+        
+        message = await ctx.send(embed=embed, file=file)
+        if file is not None and message is not None and message.attachments:
+            # แนบไฟล์ไปแล้ว: ใช้ URL ของไฟล์แนบนี้ซ้ำใน !menu ครั้งต่อไป (ไม่ต้องแนบใหม่ทุกครั้ง)
+            await self.menu_images.remember_upload(menu_url, message.attachments[0].url)
+
+    def menu_embed(self, store_id: int):
+        """
+        embed เมนูของร้าน (render ครั้งเดียวต่อ version ของรายชื่อร้าน + เมนูร้านนั้น)
+        คืน None ถ้าไม่มีทั้งรูปเมนูและรายการอาหารให้แสดง
+        ห้ามแก้ไข embed ที่ได้ไปโดยตรง (ถูกใช้ซ้ำ) ให้ .copy() ก่อน
+        """
+        version = (self.stores_cache.version(ALL_STORES_KEY), self.menu_cache.version(store_id))
+        cached = self._menu_embeds.get(store_id)
+        if cached is None or cached[0] != version:
+            stores = self.stores_cache.peek(ALL_STORES_KEY) or {}
+            if store_id not in stores:
+                return None
+            cached = (version, self._render_menu_embed(stores[store_id], self.menu_cache.peek(store_id)))
+            self._menu_embeds[store_id] = cached
+        return cached[1]
+
+    def _render_menu_embed(self, store: dict, menu_data, with_image: bool = True):
+        store_name = store["name"]
+        menu_url = store.get("menu_url") if with_image else None # นี่คือลิงก์รูปภาพ
 
         # (Requirement) ถ้า API มี menu_url ให้ใช้รูปภาพ
         if menu_url:
-            print(f"[OrderCog] ร้าน {store_name} มี menu_url: {menu_url}")
+            log.debug("ร้าน %s มี menu_url: %s", store_name, menu_url)
             embed = discord.Embed(
                 title=f"📋 เมนูร้าน {store_name}",
                 color=discord.Color.blue()
@@ -202,15 +725,15 @@ class OrderCog(commands.Cog):
         
         # (Fallback) ถ้า API ไม่มี menu_url ให้ใช้ Text (แบบเดิม)
         else:
-            print(f"[OrderCog] ร้าน {store_name} ไม่มี menu_url, ใช้เมนูแบบข้อความแทน")
+            log.debug("ร้าน %s ไม่มี menu_url, ใช้เมนูแบบข้อความแทน", store_name)
             if not menu_data:
-                await ctx.send(f"❌ ขออภัย, ไม่สามารถดึงเมนูร้าน **{store_name}** ได้ในขณะนี้")
-                return
+                return None
             
-            menu_display_list = []
-            for item in menu_data.values():
-                menu_display_list.append(f"- **{item['original_name']}** (ราคา {item['price']} บาท)")
-            menu_text = "\n".join(menu_display_list)
+            menu_text = "\n".join(
+                f"- **{item['original_name']}** (ราคา {item['price']} บาท)" for item in menu_data.values()
+            )
+            if len(menu_text) > MENU_TEXT_LIMIT:
+                menu_text = menu_text[:MENU_TEXT_LIMIT].rsplit("\n", 1)[0] + "\n…"
             
             embed = discord.Embed(
                 title=f"📋 เมนูร้าน {store_name}",
@@ -219,19 +742,19 @@ class OrderCog(commands.Cog):
             )
         
         # (Requirement 2) เพิ่มตัวอย่างวิธีสั่ง (จะถูกเพิ่มทั้งแบบรูปและแบบ Text)
-        if menu_data and list(menu_data.values()): # เช็กว่ามีเมนูอย่างน้อย 1 รายการ
-            example_name = list(menu_data.values())[0]['original_name'] # เอาชื่อเมนูแรกมาเป็นตัวอย่าง
+        first_item = next(iter(menu_data.values()), None) if menu_data else None
+        if first_item: # เช็กว่ามีเมนูอย่างน้อย 1 รายการ
+            example_name = first_item['original_name'] # เอาชื่อเมนูแรกมาเป็นตัวอย่าง
             embed.add_field(
                 name="💡 วิธีสั่งอาหาร",
                 value=f"พิมพ์ `!order {example_name}`\n"
-                      f"หรือ `!order {example_name} (สามารถระบุข้อความเพิ่มเติมถึงร้านค้า)`",
+                      f"หรือ `!order {example_name} (สามารถระบุข้อความเพิ่มเติมถึงร้านค้า)`\n"
+                      f"สั่งหลายอย่าง/หลายจาน: `!order {example_name} x2, <เมนูอื่น>`",
                 inline=False
             )
-        else:
+        elif menu_data is not None:
              embed.set_footer(text="ร้านนี้ยังไม่มีรายการอาหารในระบบ")
-        
-        await ctx.send(embed=embed)
-        # --- (จบ บล็อกแก้ไขหลัก) ---
+        return embed
 
     # -----------------------------------------------------------------
     # 6. คำสั่ง !order (Requirement 3)
@@ -239,92 +762,310 @@ class OrderCog(commands.Cog):
     @commands.command(name="order")
     async def order_cmd(self, ctx: commands.Context, *, order_string: str = None):
         
-        if not ctx.channel.name.startswith(self.ticket_prefix):
+        if not self.is_ticket_channel(ctx.channel):
             return
 
         if order_string is None:
-            await ctx.send("กรุณาระบุเมนูที่ต้องการสั่งครับ. เช่น `!order กะเพรา`")
+            await ctx.send("กรุณาระบุเมนูที่ต้องการสั่งครับ. เช่น `!order กะเพรา` หรือ `!order กะเพรา x2, ข้าวไข่เจียว (ไม่เผ็ด)`")
             return
-            
+
+        if await self.throttled(ctx):
+            return
+
+        # สั่งทีละคำสั่งต่อช่อง: ร้านที่เลือก (channel_states) ไม่เปลี่ยนกลางคัน และสองคนในทิกเก็ตเดียวกันไม่ส่งพร้อมกัน
+        async with self.channel_locks.lock(ctx.channel.id):
+            await self._place_order(ctx, order_string)
+
+    async def _place_order(self, ctx: commands.Context, order_string: str):
         channel_state = self.channel_states.get(ctx.channel.id)
         if not channel_state:
             await ctx.send("กรุณาเลือกร้านก่อนครับ พิมพ์ `!menu <ชื่อร้าน>`")
             return
             
-        store_id = channel_state["store_id"]
-        store_name = channel_state["store_name"]
+        store_id = channel_state.store_id
+        store_name = channel_state.store_name
+
+        if self.breaker.is_open:
+            await ctx.send(f"❌ ระบบร้านค้าขัดข้องชั่วคราว กรุณาลองสั่งใหม่ในอีก {self.breaker.retry_after():.0f} วินาทีครับ")
+            return
 
-        food_name, note = self.parse_order_string(order_string)
+        items = self.parse_order_string(order_string)
+        if not items:
+            await ctx.send("กรุณาระบุเมนูที่ต้องการสั่งครับ. เช่น `!order กะเพรา`")
+            return
+        if len(items) > MAX_ORDER_ITEMS:
+            await ctx.send(f"❌ สั่งได้สูงสุด {MAX_ORDER_ITEMS} รายการต่อครั้งครับ")
+            return
         
         # (สำคัญ) ตรวจสอบจาก self.menu_cache ที่โหลดไว้ตอน !menu
-        menu_data = self.menu_cache.get(store_id)
+        menu_data = await self.fetch_store_menu(store_id)
         if not menu_data:
             await ctx.send("เกิดข้อผิดพลาด, กรุณาพิมพ์ `!menu` ใหม่อีกครั้งครับ")
             return
 
-        food_details = menu_data.get(food_name.lower())
+        # ตรวจทุกรายการก่อน ถ้ามีรายการไหนไม่ถูกต้องจะไม่ส่งออเดอร์เลย (กันสั่งไม่ครบ)
+        index = self.menu_index(store_id)
+        resolved = []
+        problems = []
+        for food_name, quantity, note in items:
+            food_details = index.find(food_name)
+            if not food_details:
+                problems.append(f"❌ ไม่พบเมนู: **{food_name}** ในร้าน {store_name}" + self.did_you_mean(index.suggest(food_name)))
+            elif not 1 <= quantity <= MAX_ORDER_QUANTITY:
+                problems.append(f"❌ **{food_details['original_name']}**: สั่งได้ 1-{MAX_ORDER_QUANTITY} จานต่อรายการ")
+            else:
+                resolved.append((food_details, quantity, note))
         
-        if not food_details:
-            await ctx.send(f"❌ ไม่พบเมนู: **{food_name}** ในร้าน {store_name}")
+        if problems:
+            await ctx.send("\n".join(problems))
+            return
+
+        # กดซ้ำ: ทุกรายการเพิ่งถูกสั่ง (คนเดิม ช่องเดิม จำนวน/หมายเหตุเดิม) ภายใน COMMAND_DEDUP_WINDOW วินาที
+        dedup_keys = [
+            (ctx.channel.id, ctx.author.id, "order", food_details["id"], quantity, note)
+            for food_details, quantity, note in resolved
+        ]
+        # (ใช้ list ไม่ใช่ generator: ทุก key ต้องถูกจำไว้ ไม่หยุดที่รายการแรกที่ไม่ซ้ำ)
+        if all([self.recent_commands.seen(key) for key in dedup_keys]):
+            if self.spam_notices.seen((ctx.author.id, "duplicate")):
+                return
+            wait = math.ceil(max(self.recent_commands.retry_after(key) for key in dedup_keys))
+            await ctx.send(f"⚠️ เพิ่งสั่งรายการนี้ไปแล้ว จึงไม่ส่งซ้ำ ถ้าต้องการสั่งเพิ่มจริง ๆ พิมพ์ใหม่อีกครั้งหลัง {wait} วินาทีครับ")
             return
-            
-        product_id = food_details["id"]
-        original_name = food_details["original_name"]
-
-        order_endpoint = f"{self.api_base_url}/orders/add" #
-        payload = {
-            "student_id": ctx.author.id,
-            "store_id": store_id,
-            "product_id": product_id
-        }
-        
-        await ctx.send("...กำลังส่งออเดอร์... 🚀")
 
+        total = sum(quantity for _, quantity, _ in resolved)
+        if self.order_queue.free_slots < total:
+            self._forget_commands(dedup_keys)
+            await ctx.send("⏳ ตอนนี้มีออเดอร์รอส่งเยอะมาก กรุณาลองใหม่อีกครั้งในอีกสักครู่ครับ")
+            return
+
+        status_message = await ctx.send("...กำลังส่งออเดอร์... 🚀")
+
+        shown_attempt = 0
+
+        async def on_retry(attempt, error):
+            # แจ้งในข้อความเดิมว่ากำลังลองใหม่ (ไม่ต้องให้ลูกค้าสั่งซ้ำ), แก้เฉพาะเมื่อเลขครั้งเพิ่มขึ้น
+            nonlocal shown_attempt
+            if attempt <= shown_attempt:
+                return
+            shown_attempt = attempt
+            await status_message.edit(content=f"...กำลังส่งออเดอร์... 🚀 (ระบบร้านตอบช้า กำลังลองใหม่ครั้งที่ {attempt})")
+
+        # 1 จาน = 1 ออเดอร์ (backend ไม่มี endpoint แบบ batch) ส่งผ่านคิวซึ่งจำกัดจำนวนที่ส่งพร้อมกัน
+        # idempotency key = ID ข้อความ + ลำดับรายการ + ลำดับจาน
+        def submit(item_no, unit, food_details, note):
+            payload = {
+                "student_id": ctx.author.id,
+                "store_id": store_id,
+                "product_id": food_details["id"],
+                "note": note or ""
+            }
+            try:
+                return self.order_queue.submit(payload, f"{ctx.message.id}-{item_no}-{unit}", on_retry=on_retry)
+            except QueueFull as e:
+                return _done((False, f"ระบบรับออเดอร์เต็ม: {e}"))
+
+        results = await asyncio.gather(*(
+            asyncio.gather(*(submit(item_no, unit, food_details, note) for unit in range(quantity)))
+            for item_no, (food_details, quantity, note) in enumerate(resolved)
+        ))
+
+        # สรุป 1 บรรทัดต่อรายการ (จานที่สั่งซ้ำจะแสดงเลขออเดอร์/คิวรวมกัน)
+        lines = []
+        succeeded = 0
+        for (food_details, quantity, note), item_results, dedup_key in zip(resolved, results, dedup_keys):
+            line = f"• **{food_details['original_name']}**"
+            if quantity > 1:
+                line += f" x{quantity}"
+            if note:
+                line += f" ({note})"
+
+            placed = [result for ok, result in item_results if ok]
+            errors = [result for ok, result in item_results if not ok]
+            succeeded += len(placed)
+            if not placed:
+                # รายการนี้ไม่ได้ส่งถึงร้านเลยสักจาน: สั่งใหม่ได้ทันทีโดยไม่ถูกมองว่ากดซ้ำ
+                self.recent_commands.forget(dedup_key)
+            for result in placed:
+                if "id" in result:
+                    self.order_tracker.track(result["id"], store_id, ctx.channel.id, ctx.author.id, food_details["original_name"])
+            if placed:
+                order_ids = ", ".join(f"`{result.get('id', 'N/A')}`" for result in placed)
+                queue_numbers = ", ".join(str(result.get("queue_number", "N/A")) for result in placed) #
+                line += f"\n  เลขที่ออเดอร์: {order_ids} | 🔔 คิวที่: **{queue_numbers}**"
+            if errors:
+                line += f"\n  ❌ ไม่สำเร็จ {len(errors)} จาน: {errors[0]}"
+            lines.append(line)
+
+        if succeeded == total:
+            title, color = "✅ รับออเดอร์เรียบร้อย!", discord.Color.green()
+        elif succeeded:
+            title, color = "⚠️ รับออเดอร์ได้บางรายการ", discord.Color.orange()
+        else:
+            title, color = "❌ ส่งออเดอร์ไม่สำเร็จ", discord.Color.red()
+
+        desc = f"**ร้าน:** {store_name}\n\n" + "\n".join(lines)
+        embed = discord.Embed(title=title, description=desc, color=color)
+        embed.set_footer(text=f"สำเร็จ {succeeded}/{total} จาน" + (" • บอทจะแจ้งในช่องนี้เมื่ออาหารพร้อม 🔔" if succeeded else ""))
+        await status_message.edit(content=None, embed=embed)
+
+    async def throttled(self, ctx: commands.Context) -> bool:
+        """ผู้ใช้พิมพ์คำสั่งถี่เกิน token bucket ไหม (เตือนครั้งเดียวต่อ SPAM_NOTICE_INTERVAL ที่เหลือไม่ตอบ)"""
+        wait = self.user_limiter.acquire(ctx.author.id)
+        if not wait:
+            return False
+        if not self.spam_notices.seen((ctx.author.id, "throttled")):
+            await ctx.send(f"⏳ {ctx.author.mention} พิมพ์คำสั่งถี่เกินไป กรุณารอ {math.ceil(wait)} วินาทีแล้วลองใหม่ครับ")
+        return True
+
+    def _forget_commands(self, keys):
+        for key in keys:
+            self.recent_commands.forget(key)
+
+    async def _post_order(self, payload: dict, idempotency_key: str):
+        """
+        (API: POST /orders/add) ส่งออเดอร์ 1 รายการ (ถูกเรียกโดย worker ของ order_queue)
+        คืนค่า (สำเร็จไหม, response_json หรือข้อความ error, ควรลองใหม่ไหม)
+        """
+        headers = {"Idempotency-Key": idempotency_key}
+        try:
+            async with self.api_request("POST", "/orders/add", json=payload, headers=headers) as response:
+                if response.status == 200:
+                    return True, await response.json(), False
+                error_text = await response.text()
+                retryable = response.status >= 500 or response.status in (408, 429)
+                return False, f"เกิดข้อผิดพลาดในการส่งออเดอร์ (Status: {response.status}) `{error_text.strip()}`", retryable
+        except CircuitOpenError as e:
+            # ยังไม่ถึง backend: รอในคิวจน circuit ถึง half-open (ดู retry_delay) แล้วลองใหม่
+            # half-open: จานแรกเป็น probe จานที่เหลือรอ backoff (probe ผ่าน -> circuit ปิด -> ส่งได้)
+            # (!order ใหม่ยัง fail fast ตอน circuit เปิดก่อนเข้าคิวเหมือนเดิม)
+            return False, str(e), True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return False, f"เชื่อมต่อ API ไม่ได้: {e or type(e).__name__}", True
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาดรุนแรงในการเชื่อมต่อ API: {e}", False
+
+    async def _fetch_store_orders(self, store_id: int):
+        """(API: GET /store/orders) ออเดอร์ทั้งหมดของร้าน ใช้โดย order_tracker, คืน None ถ้าดึงไม่ได้"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(order_endpoint, json=payload) as response:
-                    
-                    if response.status == 200:
-                        response_data = await response.json()
-                        order_id = response_data.get("id", "N/A")
-                        queue_number = response_data.get("queue_number", "N/A") #
-                        
-                        title = "✅ รับออเดอร์เรียบร้อย!"
-                        desc = (
-                            f"**ร้าน:** {store_name}\n"
-                            f"**รายการ:** {original_name}\n"
-                        )
-                        if note:
-                            desc += f"**หมายเหตุ:** {note}\n"
-                        
-                        desc += f"\n**เลขที่ออเดอร์:** `{order_id}`\n"
-                        desc += f"**🔔 คุณได้คิวที่: {queue_number}**"
-                        
-                        embed = discord.Embed(title=title, description=desc, color=discord.Color.green())
-                        await ctx.send(embed=embed)
-                        
-                    else:
-                        error_text = await response.text()
-                        await ctx.send(f"❌ เกิดข้อผิดพลาดในการส่งออเดอร์ (Status: {response.status})\n`{error_text}`")
-                        
+            async with self.api_request("GET", "/store/orders", params={"store_id": store_id}) as response:
+                if response.status == 200:
+                    return await response.json() or []
+                log.warning("ไม่สามารถดึงออเดอร์ร้าน ID %s (Status: %s)", store_id, response.status)
+                return None
         except Exception as e:
-            await ctx.send(f"❌ เกิดข้อผิดพลาดรุนแรงในการเชื่อมต่อ API: {e}")
+            log.warning("เกิด Error ตอนดึงออเดอร์ร้าน ID %s: %s", store_id, e)
+            return None
+
+    async def _notify_order_changes(self, channel_id: int, changes):
+        """ส่งข้อความเดียวต่อช่อง สรุปออเดอร์ที่สถานะเปลี่ยนในรอบนี้"""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self.order_tracker.forget_channel(channel_id)
+            return
+
+        lines = []
+        mentions = set()
+        for order, status in changes:
+            if status == DONE:
+                lines.append(f"🍽️ ออเดอร์ `{order.order_id}` **{order.food_name}** เสร็จแล้ว! มารับได้เลยครับ")
+                mentions.add(order.user_id)
+            elif status == PAID:
+                lines.append(f"💵 ออเดอร์ `{order.order_id}` **{order.food_name}** ชำระเงินเรียบร้อยแล้ว")
+        content = "\n".join(lines)
+        if mentions:
+            content = " ".join(f"<@{user_id}>" for user_id in mentions) + "\n" + content
+        await channel.send(content)
+
+    # -----------------------------------------------------------------
+    # 7. คำสั่ง !cache (สำหรับแอดมิน) ดูสถิติ / ล้าง cache
+    # -----------------------------------------------------------------
+    @commands.command(name="cache")
+    @commands.has_permissions(administrator=True)
+    async def cache_cmd(self, ctx: commands.Context, action: str = None):
+        if action == "clear":
+            self.stores_cache.invalidate()
+            self.menu_cache.invalidate()
+            if self.shared_store is not None:
+                await self.shared_store.clear()
+            await ctx.send("🧹 ล้าง cache ร้านค้าและเมนูแล้ว (จะโหลดใหม่ในการเรียกครั้งถัดไป)")
+            return
+
+        embed = discord.Embed(title="🗂️ สถิติ Cache", color=discord.Color.blue())
+        for cache in (self.stores_cache, self.menu_cache):
+            stats = cache.stats()
+            embed.add_field(
+                name=f"{cache.name} (TTL {cache.ttl}s)",
+                value=(
+                    f"entries: {stats['entries']}\n"
+                    f"hit: {stats['hits']} / stale: {stats['stale_hits']} / miss: {stats['misses']}\n"
+                    f"refresh: {stats['refreshes']} / fail: {stats['load_failures']}\n"
+                    f"hit ratio: {stats['hit_ratio']:.1%}"
+                ),
+                inline=True
+            )
+        embed.set_footer(text="พิมพ์ `!cache clear` เพื่อล้าง cache")
+        await ctx.send(embed=embed)
+
+    # -----------------------------------------------------------------
+    # 8. คำสั่ง !orderqueue (สำหรับแอดมิน) ดูสถานะคิวส่งออเดอร์
+    # -----------------------------------------------------------------
+    @commands.command(name="orderqueue")
+    @commands.has_permissions(administrator=True)
+    async def order_queue_cmd(self, ctx: commands.Context):
+        stats = self.order_queue.stats()
+        embed = discord.Embed(title="📮 คิวส่งออเดอร์", color=discord.Color.blue())
+        embed.add_field(name="รอส่ง", value=f"{stats['depth']}/{stats['max_depth']}", inline=True)
+        embed.add_field(name="กำลังส่ง", value=str(stats['in_flight']), inline=True)
+        embed.add_field(name="ลองใหม่", value=str(stats['retries']), inline=True)
+        tracker = self.order_tracker.stats()
+        embed.add_field(
+            name="ติดตามสถานะออเดอร์",
+            value=(
+                f"ค้างอยู่: {tracker['outstanding']} ออเดอร์ ใน {tracker['stores']} ร้าน / "
+                f"ตรวจทุก {tracker['interval']:.0f} วินาที / "
+                f"ตรวจแล้ว: {tracker['polls']} รอบ ({tracker['requests']} request) / แจ้งเตือน: {tracker['notifications']}"
+            ),
+            inline=False
+        )
+        breaker = self.breaker.stats()
+        embed.add_field(
+            name="สถานะ backend (circuit breaker)",
+            value=(
+                f"{breaker['state']} / ล้มเหลวติดกัน: {breaker['consecutive_failures']} / "
+                f"เคยตัดวงจร: {breaker['times_opened']} ครั้ง / ปฏิเสธทันที: {breaker['rejected']}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="สะสม",
+            value=(
+                f"รับเข้า: {stats['submitted']} / สำเร็จ: {stats['succeeded']} / "
+                f"ล้มเหลว: {stats['failed']} / ปฏิเสธ (คิวเต็ม): {stats['rejected']}"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
 
     # -----------------------------------------------------------------
-    # 7. ฟังก์ชันล้าง state เมื่อปิดทิกเก็ต
+    # 9. ฟังก์ชันล้าง state เมื่อปิดทิกเก็ต
     # -----------------------------------------------------------------
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
-        if channel.id in self.channel_states:
-            try:
-                del self.channel_states[channel.id]
-                print(f"[OrderCog] ล้าง State ของช่อง {channel.name} (ID: {channel.id}) ที่ถูกปิดแล้ว")
-            except KeyError:
-                pass
+        self._ticket_channels.pop(channel.id, None)
+        self.order_tracker.forget_channel(channel.id)
+        if self.channel_states.pop(channel.id) is not None:
+            log.info("ล้าง State ของช่อง %s (ID: %s) ที่ถูกปิดแล้ว", channel.name, channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        # Ticket Tool เปลี่ยนชื่อช่องตอนปิดทิกเก็ต (เช่น closed-0001) -> จัดประเภทใหม่ครั้งหน้า
+        if before.name != after.name:
+            self._ticket_channels.pop(after.id, None)
 
 # -----------------------------------------------------------------
-# 8. ฟังก์ชัน setup (ประตูทางเข้า)
+# 10. ฟังก์ชัน setup (ประตูทางเข้า)
 # -----------------------------------------------------------------
 async def setup(bot):
     await bot.add_cog(OrderCog(bot))
-    print("[OrderCog] Cog 'OrderCog' (v_MultiStore_API_Image) has been loaded.")
+    log.info("Cog 'OrderCog' (v_MultiStore_API_Image) has been loaded.")
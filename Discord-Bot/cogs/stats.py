@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import time
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+
+from utils.metrics import Histogram, metrics
+
+log = logging.getLogger(__name__)
+
+# --- ⚙️ ตั้งค่า (เปิดเก็บสถิติด้วย BOT_METRICS=1) ---
+METRICS_HOST = "127.0.0.1"                               # เปิด endpoint เฉพาะในเครื่อง
+METRICS_PORT = int(os.getenv("BOT_METRICS_PORT", "9108"))  # 0 = ไม่เปิด HTTP endpoint (ดูผ่าน !stats อย่างเดียว)
+LOOP_LAG_INTERVAL = 0.5                                  # (วินาที) ความถี่ในการวัด event-loop lag
+# ---------------------------------
+
+
+class StatsCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._lag_task = None
+        self._runner = None
+
+    async def cog_load(self):
+        if not metrics.enabled:
+            return
+        self._lag_task = asyncio.create_task(self._sample_loop_lag())
+        if METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, METRICS_HOST, METRICS_PORT).start()
+            log.info("เปิด metrics ที่ http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
+
+    async def cog_unload(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _sample_loop_lag(self):
+        """วัดว่า event loop ตื่นช้ากว่าที่ตั้งไว้เท่าไร (ถ้ามีงานบล็อก loop ค่าจะพุ่ง)"""
+        while True:
+            expected = time.perf_counter() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            metrics.observe("bot_event_loop_lag_ms", lag_ms)
+            metrics.set("bot_event_loop_lag_last_ms", lag_ms)
+
+    async def _handle_metrics(self, request: web.Request):
+        metrics.set("bot_gateway_latency_ms", self.bot.latency * 1000)
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    # -----------------------------------------------------------------
+    # คำสั่ง !stats (สำหรับแอดมิน)
+    # -----------------------------------------------------------------
+    @commands.command(name="stats")
+    @commands.has_permissions(administrator=True)
+    async def stats_cmd(self, ctx: commands.Context):
+        embed = discord.Embed(title="📊 สถิติบอท", color=discord.Color.blue())
+
+        if not metrics.enabled:
+            embed.description = "ยังไม่ได้เปิดเก็บเวลาตอบคำสั่ง (ตั้งค่า `BOT_METRICS=1` แล้วรีสตาร์ทบอท)"
+        else:
+            commands_text = self._histogram_lines("bot_command_duration_ms", "command")
+            backend_text = self._histogram_lines("bot_backend_request_duration_ms", "endpoint")
+            embed.add_field(name="⏱️ คำสั่ง (n / p50 / p95 / p99 ms)", value=commands_text or "-", inline=False)
+            embed.add_field(name="🌐 Backend (n / p50 / p95 / p99 ms)", value=backend_text or "-", inline=False)
+
+            lag = metrics.histograms.get(("bot_event_loop_lag_ms", ()))
+            in_flight = sum(value for (name, _), value in metrics.gauges.items() if name == "bot_commands_in_flight")
+            embed.add_field(
+                name="🔁 Event loop",
+                value=(
+                    f"lag p50/p99: {lag.quantile(0.5) if lag else 0:g} / {lag.quantile(0.99) if lag else 0:g} ms\n"
+                    f"คำสั่งที่กำลังทำงาน: {in_flight:g}"
+                ),
+                inline=False
+            )
+
+        live = [f"{name}{self._format_labels(labels)}: {value:.3g}" for name, labels, value in metrics.collect()]
+        if live:
+            embed.add_field(name="🗂️ สถานะปัจจุบัน", value="\n".join(live)[:1024], inline=False)
+        embed.set_footer(text=f"Gateway latency: {round(self.bot.latency * 1000)}ms")
+        await ctx.send(embed=embed)
+
+    def _histogram_lines(self, metric: str, label: str) -> str:
+        merged = {}
+        for (name, labels), histogram in metrics.histograms.items():
+            if name == metric:
+                # รวมทุก label อื่น (เช่นทุก status ของ endpoint เดียวกัน) เป็น histogram เดียว
+                key = dict(labels).get(label, "?")
+                merged.setdefault(key, Histogram()).merge(histogram)
+        lines = []
+        for key, histogram in sorted(merged.items()):
+            lines.append(
+                f"`{key}` {histogram.count} / {histogram.quantile(0.5):g} / "
+                f"{histogram.quantile(0.95):g} / {histogram.quantile(0.99):g}"
+            )
+        return "\n".join(lines)[:1024]
+
+    def _format_labels(self, labels: dict) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f"{value}" for value in labels.values()) + "}"
+
+
+async def setup(bot):
+    await bot.add_cog(StatsCog(bot))
@@ -0,0 +1,87 @@
+"""
+รันบอทหลายโปรเซส แบ่ง shard ให้แต่ละโปรเซส (ใช้หลาย core ได้)
+
+แต่ละโปรเซสคือ bot.py ปกติที่ได้ environment ต่างกัน:
+  BOT_SHARD_COUNT / BOT_SHARD_IDS  shard ที่โปรเซสนั้นถือ
+  BOT_SHARED_STORE=1               แชร์ cache ร้าน/เมนูผ่าน data/shared_cache.sqlite
+  BOT_METRICS_PORT                 พอร์ต metrics ไม่ชนกัน (ถ้าเปิด BOT_METRICS=1)
+state ของช่องทิกเก็ตอยู่ใน data/channel_states.sqlite ไฟล์เดียวกัน (guild หนึ่งอยู่ shard เดียว
+จึงไม่มีสองโปรเซสเขียนช่องเดียวกัน)
+
+วิธีรัน:
+    python launcher.py --shards 4 --processes 2
+โปรเซสไหนตายจะถูกสั่งรันใหม่ (รอ --restart-delay วินาที) กด Ctrl+C เพื่อปิดทุกโปรเซส
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+from utils.logs import setup_logging
+from utils.sharding import split_shards
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_METRICS_PORT = 9108
+
+log = logging.getLogger("launcher")
+
+
+async def run_process(index: int, shard_ids: list[int], args, stopping: asyncio.Event):
+    env = dict(os.environ)
+    env["BOT_SHARD_COUNT"] = str(args.shards)
+    env["BOT_SHARD_IDS"] = ",".join(map(str, shard_ids))
+    env["BOT_SHARED_STORE"] = "1"
+    metrics_port = int(os.getenv("BOT_METRICS_PORT", str(DEFAULT_METRICS_PORT)))
+    if metrics_port:
+        env["BOT_METRICS_PORT"] = str(metrics_port + index)
+
+    while not stopping.is_set():
+        process = await asyncio.create_subprocess_exec(sys.executable, os.path.join(BOT_DIR, "bot.py"), cwd=BOT_DIR, env=env)
+        log.info("process %d (pid %d) started with shards %s/%d", index, process.pid, shard_ids, args.shards)
+        waiter = asyncio.ensure_future(process.wait())
+        stopper = asyncio.ensure_future(stopping.wait())
+        await asyncio.wait({waiter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        stopper.cancel()
+
+        if stopping.is_set():
+            if process.returncode is None:
+                process.send_signal(signal.SIGINT)
+                try:
+                    await asyncio.wait_for(waiter, timeout=15)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await waiter
+            return
+
+        log.error("process %d exited with code %s, restarting in %ss", index, process.returncode, args.restart_delay)
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=args.restart_delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, required=True, help="จำนวน shard ทั้งหมด")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="จำนวนโปรเซส (ไม่เกินจำนวน shard)")
+    parser.add_argument("--restart-delay", type=float, default=5.0, help="(วินาที) รอก่อนรันโปรเซสที่ตายใหม่")
+    args = parser.parse_args()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    groups = split_shards(args.shards, args.processes)
+    log.info("launching %d processes for %d shards: %s", len(groups), args.shards, groups)
+    await asyncio.gather(*(run_process(index, shard_ids, args, stopping) for index, shard_ids in enumerate(groups)))
+
+
+if __name__ == "__main__":
+    listener = setup_logging(filename="launcher.log")
+    try:
+        asyncio.run(main())
+    finally:
+        listener.stop()
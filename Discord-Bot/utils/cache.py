@@ -0,0 +1,144 @@
+"""
+Cache แบบมีอายุ (TTL) สำหรับข้อมูลที่ดึงจาก API
+
+- entry ที่ยังไม่หมดอายุ -> คืนค่าทันที (hit)
+- entry ที่หมดอายุแล้ว -> คืนค่าเดิมทันที แล้ว refresh เบื้องหลัง (stale-while-revalidate)
+- ไม่มี entry -> รอโหลด (miss)
+
+การโหลด key เดียวกันพร้อมกันหลายที่จะถูกรวมเป็นการเรียก loader ครั้งเดียว (single-flight)
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+Loader = Callable[[Hashable], Awaitable[Optional[Any]]]
+
+
+class CacheEntry:
+    __slots__ = ("value", "version", "fetched_at")
+
+    def __init__(self, value: Any, version: int, fetched_at: float):
+        self.value = value
+        self.version = version
+        self.fetched_at = fetched_at
+
+
+class TTLCache:
+    """
+    `loader(key)` ต้องคืนค่าที่จะเก็บ หรือ None ถ้าโหลดไม่สำเร็จ (จะไม่ถูกเก็บลง cache)
+    `ttl` คืออายุ (วินาที) ของ entry ก่อนจะถือว่า stale
+    `max_stale` คือระยะเวลาหลังหมดอายุที่ยังยอมคืนค่าเก่าได้ (None = ไม่จำกัด)
+    """
+
+    def __init__(self, loader: Loader, ttl: float, max_stale: Optional[float] = None, name: str = "cache"):
+        self._loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.name = name
+
+        self._entries: dict[Hashable, CacheEntry] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._versions: dict[Hashable, int] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.load_failures = 0
+
+    # -----------------------------------------------------------------
+    # อ่านค่า
+    # -----------------------------------------------------------------
+    async def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if self.max_stale is None or age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                self._load(key)
+                return entry.value
+
+        self.misses += 1
+        # shield: ถ้าคนที่รออยู่ถูกยกเลิก การโหลดที่คนอื่นรอร่วมอยู่จะไม่ถูกยกเลิกไปด้วย
+        return await asyncio.shield(self._load(key))
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """คืนค่าที่มีอยู่ (แม้จะ stale) โดยไม่โหลดใหม่และไม่นับสถิติ"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def version(self, key: Hashable) -> int:
+        """เลข version ของ key (เพิ่มขึ้นทุกครั้งที่ค่าเปลี่ยนหรือถูก invalidate), 0 = ยังไม่เคยโหลด"""
+        return self._versions.get(key, 0)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -----------------------------------------------------------------
+    # เขียน / ล้างค่า
+    # -----------------------------------------------------------------
+    def set(self, key: Hashable, value: Any):
+        entry = self._entries.get(key)
+        if entry is None or entry.value != value:
+            self._versions[key] = self._versions.get(key, 0) + 1
+        self._entries[key] = CacheEntry(value, self._versions[key], time.monotonic())
+
+    def invalidate(self, key: Hashable = None):
+        """ล้าง key ที่ระบุ (หรือทั้งหมดถ้าไม่ระบุ) ให้การ get ครั้งถัดไปโหลดใหม่"""
+        keys = list(self._entries) if key is None else [key]
+        for k in keys:
+            if self._entries.pop(k, None) is not None:
+                self._versions[k] = self._versions.get(k, 0) + 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "load_failures": self.load_failures,
+            "inflight": len(self._inflight),
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    async def close(self):
+        """ยกเลิกการโหลดที่ค้างอยู่ทั้งหมด (เรียกตอน cog_unload)"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # -----------------------------------------------------------------
+    # โหลดค่า (single-flight)
+    # -----------------------------------------------------------------
+    def _load(self, key: Hashable) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_loader(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_load_done(k, t))
+        return task
+
+    async def _run_loader(self, key: Hashable) -> Optional[Any]:
+        value = await self._loader(key)
+        if value is None:
+            self.load_failures += 1
+        else:
+            self.set(key, value)
+        return value
+
+    def _on_load_done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.load_failures += 1
@@ -0,0 +1,221 @@
+"""
+เก็บว่าช่องทิกเก็ตไหนเลือกร้านอะไรอยู่ (แทน dict ธรรมดา)
+
+- จำกัดขนาด (max_size) ตัดช่องที่ไม่ได้ใช้นานที่สุดออกจากหน่วยความจำก่อน (LRU) แต่ไม่ลบในไฟล์
+  (ไฟล์ใช้ร่วมกันหลายโปรเซส แถวในไฟล์หมดไปเองตาม ttl)
+- ช่องที่ไม่ได้แตะ (set หรือ get) เกิน ttl วินาทีถือว่าหมดอายุ (ทิกเก็ตที่ถูก archive แทนการลบ)
+  get ต่ออายุให้ด้วย แต่บันทึกลงไฟล์ไม่เกินครั้งละ touch_interval วินาทีต่อช่อง
+- บันทึกลง SQLite แบบ write-behind: รวมการเปลี่ยนแปลงแล้วเขียนทีเดียวทุก flush_interval วินาที
+  และโหลดกลับทั้งหมดด้วย query เดียวตอนเริ่มบอท
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from utils.shared_store import connect
+
+log = logging.getLogger(__name__)
+
+
+class ChannelState:
+    __slots__ = ("store_id", "store_name", "updated_at")
+
+    def __init__(self, store_id: int, store_name: str, updated_at: float):
+        self.store_id = store_id
+        self.store_name = store_name
+        self.updated_at = updated_at
+
+
+class ChannelStateStore:
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_size: int = 5000,
+        ttl: float = 12 * 60 * 60,
+        flush_interval: float = 5.0,
+        touch_interval: float = 60.0,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.touch_interval = touch_interval
+
+        self._states: OrderedDict[int, ChannelState] = OrderedDict()
+        self._dirty: set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        self.evicted = 0
+        self.expired = 0
+        self.flushes = 0
+
+    # -----------------------------------------------------------------
+    # ใช้งานแบบ dict
+    # -----------------------------------------------------------------
+    def get(self, channel_id: int) -> Optional[ChannelState]:
+        state = self._states.get(channel_id)
+        if state is None:
+            return None
+        now = time.time()
+        if now - state.updated_at > self.ttl:
+            self.expired += 1
+            self._remove(channel_id)
+            return None
+        if now - state.updated_at > self.touch_interval:
+            # ยังใช้อยู่ (เช่น !order ต่อเนื่องโดยไม่ !menu ใหม่): ต่ออายุ
+            state.updated_at = now
+            self._dirty.add(channel_id)
+        self._states.move_to_end(channel_id)
+        return state
+
+    def set(self, channel_id: int, store_id: int, store_name: str):
+        self._states[channel_id] = ChannelState(store_id, store_name, time.time())
+        self._states.move_to_end(channel_id)
+        self._dirty.add(channel_id)
+        while len(self._states) > self.max_size:
+            oldest, _ = self._states.popitem(last=False)
+            self._dirty.discard(oldest)     # ไม่ต้องเขียน/ลบในไฟล์ (อาจเป็นของโปรเซสอื่น)
+            self.evicted += 1
+
+    def pop(self, channel_id: int) -> Optional[ChannelState]:
+        state = self._states.get(channel_id)
+        if state is not None:
+            self._remove(channel_id)
+        return state
+
+    def prune(self, keep: Callable[[int], bool], forget_only: bool = False) -> int:
+        """
+        ลบช่องที่ keep(channel_id) เป็น False (เช่นช่องที่ถูกลบตอนบอทออฟไลน์) คืนจำนวนที่ลบ
+        forget_only=True: เอาออกจากหน่วยความจำอย่างเดียว ไม่ลบในไฟล์ (ช่องของ shard ที่โปรเซสอื่นดูแล)
+        """
+        removed = [channel_id for channel_id in self._states if not keep(channel_id)]
+        for channel_id in removed:
+            if forget_only:
+                del self._states[channel_id]
+            else:
+                self._remove(channel_id)
+        return len(removed)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return self.get(channel_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._states),
+            "max_size": self.max_size,
+            "dirty": len(self._dirty),
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "flushes": self.flushes,
+        }
+
+    def _remove(self, channel_id: int):
+        del self._states[channel_id]
+        self._dirty.add(channel_id)
+
+    # -----------------------------------------------------------------
+    # บันทึก / โหลด (SQLite ทำงานใน thread เพื่อไม่ให้ event loop ค้าง)
+    # -----------------------------------------------------------------
+    async def load(self) -> int:
+        """โหลด state ทั้งหมดที่ยังไม่หมดอายุกลับมา คืนจำนวนช่องที่โหลดได้"""
+        if not self.path:
+            return 0
+        rows = await asyncio.to_thread(self._read_rows, time.time() - self.ttl)
+        for channel_id, store_id, store_name, updated_at in rows:
+            self._states[channel_id] = ChannelState(store_id, store_name, updated_at)
+        # เกิน max_size: เก็บเฉพาะที่ใช้ล่าสุดไว้ในหน่วยความจำ ไม่ลบในไฟล์ (แถวของโปรเซสอื่นอยู่ในไฟล์เดียวกัน)
+        while len(self._states) > self.max_size:
+            self._states.popitem(last=False)
+            self.evicted += 1
+        return len(self._states)
+
+    def start(self):
+        if self.path and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """เขียนการเปลี่ยนแปลงที่ค้างอยู่ลง SQLite ใน transaction เดียว"""
+        if not self.path:
+            self._dirty.clear()
+            return
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            upserts = []
+            deletes = []
+            for channel_id in dirty:
+                state = self._states.get(channel_id)
+                if state is None:
+                    deletes.append((channel_id,))
+                else:
+                    upserts.append((channel_id, state.store_id, state.store_name, state.updated_at))
+            try:
+                await asyncio.to_thread(self._write_rows, upserts, deletes, time.time() - self.ttl)
+            except Exception:
+                # เขียนไม่สำเร็จ: เก็บไว้เขียนรอบหน้า
+                self._dirty |= dirty
+                raise
+            self.flushes += 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error("บันทึก state ไม่สำเร็จ: %s", e)
+
+    def _connect(self) -> sqlite3.Connection:
+        # WAL: หลายโปรเซส (แต่ละ shard) ใช้ไฟล์เดียวกันได้ แต่ละโปรเซสเขียนเฉพาะช่องของ guild ตัวเอง
+        db = connect(self.path)
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS channel_states (
+                channel_id INTEGER PRIMARY KEY,
+                store_id   INTEGER NOT NULL,
+                store_name TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        return db
+
+    def _read_rows(self, min_updated_at: float):
+        db = self._connect()
+        try:
+            return db.execute(
+                "SELECT channel_id, store_id, store_name, updated_at FROM channel_states "
+                "WHERE updated_at >= ? ORDER BY updated_at",
+                (min_updated_at,),
+            ).fetchall()
+        finally:
+            db.close()
+
+    def _write_rows(self, upserts, deletes, min_updated_at: float):
+        db = self._connect()
+        try:
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO channel_states (channel_id, store_id, store_name, updated_at) VALUES (?, ?, ?, ?)",
+                    upserts,
+                )
+                db.executemany("DELETE FROM channel_states WHERE channel_id = ?", deletes)
+                db.execute("DELETE FROM channel_states WHERE updated_at < ?", (min_updated_at,))
+        finally:
+            db.close()
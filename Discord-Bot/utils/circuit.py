@@ -0,0 +1,98 @@
+"""
+Circuit breaker สำหรับการเรียก API
+
+- closed    : เรียกได้ปกติ, ล้มเหลวติดกันครบ failure_threshold ครั้ง -> open
+- open      : ปฏิเสธทันที (fail fast) จนครบ reset_timeout วินาที -> half-open
+- half-open : ปล่อยให้ลองเรียก (probe) ได้ครั้งละ half_open_max_calls
+              สำเร็จ -> closed, ล้มเหลว -> open อีกรอบ, จบโดยไม่รู้ผล (release) -> คืนสิทธิ์ probe
+"""
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0, half_open_max_calls: int = 1, name: str = "backend"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def retry_after(self) -> float:
+        """เหลืออีกกี่วินาทีจะเริ่ม probe (0 ถ้าไม่ได้ open)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """เรียกก่อนยิง request ทุกครั้ง; False = ห้ามเรียก (ต้อง fail fast)"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def check(self):
+        """เหมือน allow() แต่ raise CircuitOpenError แทนการคืน False"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} ไม่พร้อมใช้งาน (ลองใหม่ในอีก {self.retry_after():.0f} วินาที)")
+
+    def release(self):
+        """
+        คืนสิทธิ์ probe ที่ได้จาก allow()/check() แต่จบไปโดยไม่ได้ record_success/record_failure
+        (เช่นถูก cancel) ไม่งั้น half-open จะค้างเพราะ probe ไม่ว่างตลอดไป
+        """
+        if self._state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self):
+        self._state = CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.times_opened += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._probes = 0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after(),
+        }
@@ -0,0 +1,92 @@
+"""
+โหลด cog ทั้งหมดในแพ็กเกจ cogs พร้อมกัน แล้วรายงานเวลาที่ใช้ของแต่ละตัว
+
+- หา cog จาก __path__ ของแพ็กเกจ (ไม่ขึ้นกับว่ารันบอทจากโฟลเดอร์ไหน)
+- ไฟล์ที่ไม่มี setup(bot) ไม่ใช่ cog -> ข้าม
+- cog ที่ต้องโหลดหลังตัวอื่น ประกาศไว้ในไฟล์ได้ เช่น COG_DEPENDS = ("cogs.order",) (ต้องเป็นค่าคงที่)
+- อ่าน setup/COG_DEPENDS จาก source ด้วย ast ไม่ import ไฟล์ cog เอง
+  (bot.load_extension สร้าง module ใหม่ทุกครั้ง ถ้า import ตอนค้นหาด้วย โค้ดระดับไฟล์จะรันสองรอบ)
+  cog ที่ไม่ขึ้นกับกันจะโหลดพร้อมกันเป็นรอบ ๆ (cog_load ที่ต้องรอ I/O จะไม่ต่อคิวกัน)
+"""
+import ast
+import asyncio
+import importlib
+import importlib.util
+import logging
+import pkgutil
+import time
+
+from discord.ext import commands
+
+log = logging.getLogger(__name__)
+
+
+def discover_cogs(package: str = "cogs") -> dict[str, tuple[str, ...]]:
+    """คืน {ชื่อ extension: cog ที่ต้องโหลดก่อน} ของทุกไฟล์ในแพ็กเกจที่มี setup()"""
+    root = importlib.import_module(package)
+    found = {}
+    for info in pkgutil.iter_modules(root.__path__, prefix=f"{package}."):
+        if info.ispkg or info.name.rsplit(".", 1)[-1].startswith("_"):
+            continue
+        spec = importlib.util.find_spec(info.name)
+        if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+            continue
+        with open(spec.origin, "rb") as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+        has_setup, depends = _scan_module(tree)
+        if not has_setup:
+            log.debug("Skipping %s (no setup function)", info.name)
+            continue
+        found[info.name] = depends
+    return found
+
+
+def _scan_module(tree: ast.Module) -> tuple[bool, tuple[str, ...]]:
+    """(มี setup() ระดับไฟล์ไหม, ค่า COG_DEPENDS) จาก ast ของไฟล์"""
+    has_setup = False
+    depends: tuple[str, ...] = ()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "setup":
+            has_setup = True
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == "COG_DEPENDS" for t in targets):
+                depends = tuple(ast.literal_eval(node.value))
+    return has_setup, depends
+
+
+async def load_cogs(bot: commands.Bot, package: str = "cogs") -> dict[str, float]:
+    """โหลดทุก cog (พร้อมกันเท่าที่ dependency อนุญาต) คืน {ชื่อ: เวลาที่ใช้เป็นวินาที}"""
+    started = time.perf_counter()
+    pending = discover_cogs(package)
+    timings: dict[str, float] = {}
+    failed: set[str] = set()
+
+    async def load(name: str):
+        began = time.perf_counter()
+        try:
+            await bot.load_extension(name)
+        except Exception:
+            failed.add(name)
+            log.exception("Failed to load %s", name)
+        timings[name] = time.perf_counter() - began
+
+    while pending:
+        done = timings.keys() - failed
+        ready = [name for name, depends in pending.items() if all(dep in done for dep in depends)]
+        if not ready:
+            # dependency วนกันหรือขึ้นกับ cog ที่โหลดไม่สำเร็จ/ไม่มีอยู่
+            for name, depends in pending.items():
+                log.error("Not loading %s: unmet dependencies %s", name, [d for d in depends if d not in done])
+            break
+        for name in ready:
+            del pending[name]
+        await asyncio.gather(*(load(name) for name in ready))
+
+    total = time.perf_counter() - started
+    report = ", ".join(
+        f"{name.rsplit('.', 1)[-1]}={seconds * 1000:.0f}ms{' (failed)' if name in failed else ''}"
+        for name, seconds in sorted(timings.items(), key=lambda item: -item[1])
+    )
+    log.info("Loaded %d cogs in %.0fms: %s", len(timings) - len(failed), total * 1000, report)
+    return timings
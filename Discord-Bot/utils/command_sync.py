@@ -0,0 +1,71 @@
+"""
+sync slash command เฉพาะตอนที่คำสั่งเปลี่ยนจริง ๆ
+
+tree.sync() แบบ global ช้าและโดน rate limit ง่าย แต่ถ้าคำสั่งไม่ได้เปลี่ยนก็ไม่ต้อง sync ซ้ำ
+จึงคำนวณ fingerprint (sha256) จาก payload ที่ discord.py จะส่งไปตอน sync แล้วจำไว้ในไฟล์
+แยกตาม application และ scope (global / guild) รอบถัดไปถ้า fingerprint ตรงกันก็ข้ามได้เลย
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+log = logging.getLogger(__name__)
+
+
+def fingerprint(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """hash ของคำสั่งทั้งหมดใน scope นั้น (เรียงตามชื่อ ลำดับการลงทะเบียนไม่มีผล)"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda data: (data.get("type", 1), data["name"]),
+    )
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def sync_if_changed(
+    tree: app_commands.CommandTree,
+    state_path: str,
+    application_id: int,
+    guild: Optional[discord.abc.Snowflake] = None,
+    force: bool = False,
+) -> Optional[int]:
+    """
+    sync เมื่อ fingerprint ต่างจากครั้งก่อน คืนจำนวนคำสั่งที่ sync หรือ None ถ้าข้าม
+    บันทึก fingerprint หลัง sync สำเร็จเท่านั้น (sync พังรอบหน้าจะลองใหม่)
+    """
+    scope = f"{application_id}:{guild.id if guild else 'global'}"
+    current = fingerprint(tree, guild=guild)
+    state = await asyncio.to_thread(_read_state, state_path)
+
+    if not force and state.get(scope) == current:
+        log.info("Command tree unchanged (%s), skipping sync", scope)
+        return None
+
+    synced = await tree.sync(guild=guild)
+    state[scope] = current
+    await asyncio.to_thread(_write_state, state_path, state)
+    return len(synced)
+
+
+def _read_state(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path: str, state: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
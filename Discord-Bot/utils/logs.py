@@ -0,0 +1,136 @@
+"""
+ระบบ log ของบอทแบบไม่บล็อก event loop
+
+ทุก logger ส่ง record เข้า QueueHandler (แค่ put ลงคิวในหน่วยความจำ) แล้ว QueueListener
+ที่รันใน thread แยกเป็นคนเขียนลงไฟล์/จอ บอทจึงไม่ต้องรอ disk หรือ stdout ตอนมี log เยอะ ๆ
+
+- ไฟล์เป็น JSON บรรทัดละ record (อ่านต่อด้วย jq หรือส่งเข้า log collector ได้)
+- หมุนไฟล์ตามขนาด (LOG_MAX_BYTES) หรือตามเวลา (LOG_ROTATE=midnight)
+- ตั้งระดับแยกตาม module ได้ เช่น LOG_LEVELS="discord=WARNING,cogs.order=DEBUG"
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+LOG_FILE = "bot.log"
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = 10000  # log ที่ล้นคิวจะถูกทิ้ง (ดีกว่าทำให้บอทค้าง)
+
+# ค่าเริ่มต้น: ของบอทเองที่ INFO, ของ discord.py ไม่เอา DEBUG (heartbeat ของ gateway)
+DEFAULT_LEVELS = {
+    "": "INFO",
+    "discord": "INFO",
+    "discord.gateway": "WARNING",
+    "discord.http": "WARNING",
+}
+
+# field มาตรฐานของ LogRecord ที่ไม่ต้องใส่ซ้ำใน JSON (ที่เหลือคือ extra={...})
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """แปลง record เป็น JSON หนึ่งบรรทัด ใส่ค่าจาก extra={...} ไว้ด้วย"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DropWhenFull(logging.handlers.QueueHandler):
+    """QueueHandler ที่ไม่รอเมื่อคิวเต็ม (put_nowait) แต่นับจำนวนที่ทิ้งไว้แทน"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # ทำข้อความให้เสร็จใน thread ต้นทาง (args อาจเปลี่ยนค่าภายหลัง) แต่เก็บ traceback แยกไว้ใน exc_text
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """ "discord=WARNING,cogs.order=DEBUG" -> {"discord": "WARNING", "cogs.order": "DEBUG"} """
+    levels = {}
+    for part in spec.split(","):
+        name, sep, level = part.partition("=")
+        if not sep:
+            # เขียนแค่ระดับเดียว เช่น LOG_LEVELS=DEBUG = ตั้งที่ root
+            name, level = "", name
+        if level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(
+    log_dir: str = LOG_DIR,
+    levels: dict[str, str] | None = None,
+    rotate: str | None = None,
+    console: bool = True,
+    filename: str = LOG_FILE,
+) -> logging.handlers.QueueListener:
+    """
+    ตั้งค่า logging ทั้งโปรเซส แล้วคืน listener (เรียก .stop() ตอนปิดบอทเพื่อเขียน log ที่ค้างให้หมด)
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    # แต่ละโปรเซสต้องมีไฟล์ของตัวเอง (การหมุนไฟล์ข้ามโปรเซสไม่ปลอดภัย)
+    path = os.path.join(log_dir, filename)
+    rotate = rotate or os.getenv("LOG_ROTATE", "size")
+
+    if rotate == "size":
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=rotate, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(
+            logging.Formatter("[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{")
+        )
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_DropWhenFull(log_queue))
+
+    merged = dict(DEFAULT_LEVELS)
+    merged.update(levels if levels is not None else parse_levels(os.getenv("LOG_LEVELS", "")))
+    for name, level in merged.items():
+        logging.getLogger(name or None).setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
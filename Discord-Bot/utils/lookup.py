@@ -0,0 +1,149 @@
+"""
+ดัชนีค้นหาชื่อ (ร้าน / เมนู) ที่ทนต่อการพิมพ์ไม่ตรงเป๊ะ
+
+- normalize: ตัวพิมพ์เล็ก/ใหญ่, ช่องว่างซ้ำ, zero-width, "ํา" -> "ำ"
+- loose key: ตัดช่องว่าง, วรรณยุกต์ไทย, การันต์ และเครื่องหมายวรรคตอนออก
+- prefix: ค้นด้วย bisect บน key ที่เรียงไว้
+- trigram + edit distance: สำหรับ "คุณหมายถึง ... ?" เมื่อพิมพ์ผิด
+
+ดัชนีสร้างครั้งเดียวต่อข้อมูลหนึ่งชุด การค้นหาแต่ละครั้งไม่ต้องไล่ดูทุกรายการ
+"""
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "​‌‍⁠﻿"))
+_WHITESPACE = re.compile(r"\s+")
+# ช่องว่าง ไม้เอก ไม้โท ไม้ตรี ไม้จัตวา และการันต์ (U+0E48-U+0E4C)
+# ห้ามใช้ \W: Python นับสระบน/ล่าง (ั ิ ี ึ ื ุ ู ็) เป็น non-word ด้วย ทำให้ "กุ้ง" กับ "กั้ง" กลายเป็น key เดียวกัน
+_LOOSE_DROP = re.compile(r"[\s\u0e48-\u0e4c]+")
+
+SUGGEST_MIN_SCORE = 0.45    # คะแนนความใกล้เคียงขั้นต่ำที่จะแนะนำ (0-1)
+SUGGEST_CANDIDATES = 12     # จำนวน candidate จาก trigram ที่จะนำไปคิด edit distance
+
+
+def normalize(text: str) -> str:
+    """รูปแบบมาตรฐานของชื่อ: NFC, casefold, ตัด zero-width และยุบช่องว่าง"""
+    text = unicodedata.normalize("NFC", text).translate(_ZERO_WIDTH)
+    text = text.replace("ํา", "ำ")  # นิคหิต + สระอา -> สระอำ
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def loose_key(text: str) -> str:
+    """key แบบหลวม: ไม่สนช่องว่าง วรรณยุกต์ และเครื่องหมายวรรคตอน"""
+    text = _LOOSE_DROP.sub("", normalize(text))
+    # เครื่องหมายวรรคตอน (P*) และสัญลักษณ์ (S*) เช่น - . ( ) / + ฯ
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] not in "PS")
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance ที่หยุดทันทีเมื่อเกิน limit (คืน limit + 1)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            insert = current[j - 1] + 1
+            delete = previous[j] + 1
+            if insert < cost:
+                cost = insert
+            if delete < cost:
+                cost = delete
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class LookupIndex:
+    """
+    `entries` คือ (ชื่อที่แสดง, ค่า) เช่น ("ข้าวมันไก่", {...}) หรือ ("โคเจ", store_id)
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, Any]]):
+        self._names: list[str] = []
+        self._values: list[Any] = []
+        self._loose: list[str] = []
+        self._exact: dict[str, int] = {}
+        self._by_loose: dict[str, int] = {}
+        self._postings: dict[str, list[int]] = {}
+
+        for name, value in entries:
+            idx = len(self._names)
+            key = loose_key(name)
+            self._names.append(name)
+            self._values.append(value)
+            self._loose.append(key)
+            self._exact.setdefault(normalize(name), idx)
+            self._by_loose.setdefault(key, idx)
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, []).append(idx)
+
+        self._sorted = sorted((key, idx) for idx, key in enumerate(self._loose))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def find(self, query: str) -> Optional[Any]:
+        """หาค่าที่ตรงกับ query (ตรงทุกตัว หรือต่างแค่ช่องว่าง/วรรณยุกต์/ตัวพิมพ์)"""
+        idx = self._exact.get(normalize(query))
+        if idx is None:
+            idx = self._by_loose.get(loose_key(query))
+        return None if idx is None else self._values[idx]
+
+    def prefix(self, query: str, limit: int = 10) -> list[tuple[str, Any]]:
+        """รายการที่ขึ้นต้นด้วย query (แบบหลวม)"""
+        return [(self._names[idx], self._values[idx]) for idx in self._prefix_ids(loose_key(query), limit)]
+
+    def _prefix_ids(self, key: str, limit: int) -> list[int]:
+        if not key:
+            return []
+        found = []
+        start = bisect.bisect_left(self._sorted, (key, -1))
+        for loose, idx in self._sorted[start:]:
+            if not loose.startswith(key) or len(found) >= limit:
+                break
+            found.append(idx)
+        return found
+
+    def suggest(self, query: str, limit: int = 3) -> list[tuple[str, Any]]:
+        """รายการที่ใกล้เคียง query มากที่สุด เรียงจากใกล้ที่สุด (ใช้ทำ "คุณหมายถึง ... ?")"""
+        key = loose_key(query)
+        if not key:
+            return []
+
+        shared = Counter()
+        for gram in trigrams(key):
+            for idx in self._postings.get(gram, ()):
+                shared[idx] += 1
+        prefix_hits = self._prefix_ids(key, SUGGEST_CANDIDATES)
+
+        # รายการที่ขึ้นต้นด้วย query ถือว่าใกล้เคียงมากเสมอ
+        scored = [(0.9, idx) for idx in prefix_hits]
+        for idx, _ in shared.most_common(SUGGEST_CANDIDATES):
+            if idx in prefix_hits:
+                continue
+            candidate = self._loose[idx]
+            longest = max(len(key), len(candidate))
+            max_edits = int(longest * (1 - SUGGEST_MIN_SCORE))
+            score = 1 - edit_distance(key, candidate, max_edits) / longest
+            if score >= SUGGEST_MIN_SCORE:
+                scored.append((score, idx))
+
+        scored.sort(key=lambda item: (-item[0], len(self._loose[item[1]])))
+        return [(self._names[idx], self._values[idx]) for _, idx in scored[:limit]]
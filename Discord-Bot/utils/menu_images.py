@@ -0,0 +1,302 @@
+"""
+cache รูปเมนู (menu_url) ของร้านไว้ในเครื่อง
+
+menu_url ใน backend ส่วนใหญ่เป็นลิงก์ไฟล์แนบของ Discord (media.discordapp.net / cdn.discordapp.com)
+ซึ่งมีลายเซ็นหมดอายุ (?ex=<เวลาหมดอายุเป็น hex>&is=...&hm=...) พอหมดอายุ embed จะไม่มีรูป
+
+- ดาวน์โหลดรูปครั้งเดียวต่อไฟล์ต้นทาง เก็บเป็น <sha256>.<นามสกุล> (รูปเหมือนกันเก็บไฟล์เดียว)
+  ไฟล์แนบเดียวกันที่ลายเซ็นเปลี่ยนยังนับเป็นไฟล์เดิม (key คือ path ของไฟล์แนบ ไม่รวม query)
+- ลิงก์ต้นทางยังไม่หมดอายุ -> ใช้ลิงก์เดิม
+- หมดอายุแล้ว -> อัปโหลดไฟล์ในเครื่องเป็นไฟล์แนบใหม่ (ถ้ามี `upload`) แล้วใช้ URL ของไฟล์แนบนั้นซ้ำ
+  จนกว่าจะใกล้หมดอายุอีกรอบ, ถ้าไม่มี `upload` ให้ผู้เรียกแนบไฟล์ไปกับข้อความเอง
+  แล้วบอก URL ของไฟล์แนบที่ส่งไปกลับมาด้วย remember_upload() เพื่อใช้ซ้ำแบบเดียวกัน
+index (ลิงก์ -> ไฟล์, ไฟล์ -> URL ที่อัปโหลดแล้ว) บันทึกใน index.json ในโฟลเดอร์เดียวกัน
+หลายโปรเซส (launcher.py) ใช้โฟลเดอร์เดียวกัน: ตอนบันทึกจะรวมกับ index ในไฟล์ก่อนเขียนทับ
+(ถือ lock ของไฟล์ระหว่างอ่าน-รวม-เขียน) รายการของโปรเซสอื่นจึงไม่หาย และโปรเซสนี้ได้เห็นด้วย
+"""
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import fcntl
+except ImportError:     # Windows: รวม index ได้แต่ไม่มี lock ระหว่างโปรเซส
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+DISCORD_CDN_HOSTS = frozenset({"cdn.discordapp.com", "media.discordapp.net"})
+INDEX_FILE = "index.json"
+INDEX_LOCK_FILE = "index.lock"
+
+
+def expires_at(url: str) -> Optional[float]:
+    """เวลาหมดอายุ (unix time) ของลิงก์ไฟล์แนบ Discord จากพารามิเตอร์ ex= หรือ None ถ้าไม่มีวันหมดอายุ"""
+    parts = urlsplit(url)
+    if parts.hostname not in DISCORD_CDN_HOSTS:
+        return None
+    ex = parse_qs(parts.query).get("ex")
+    if not ex:
+        return None
+    try:
+        return float(int(ex[0], 16))
+    except ValueError:
+        return None
+
+
+def merge_index(disk: dict, ours: dict) -> dict:
+    """
+    รวม index ในไฟล์ (ของทุกโปรเซส) กับของโปรเซสนี้
+    sources: ของเราทับของในไฟล์, uploads: ใช้ URL ที่หมดอายุทีหลัง
+    """
+    uploads = dict(disk.get("uploads", {}))
+    for sha256, url in ours.get("uploads", {}).items():
+        if sha256 not in uploads or _expiry_order(url) >= _expiry_order(uploads[sha256]):
+            uploads[sha256] = url
+    return {"sources": {**disk.get("sources", {}), **ours.get("sources", {})}, "uploads": uploads}
+
+
+def _expiry_order(url: str) -> float:
+    expiry = expires_at(url)
+    return float("inf") if expiry is None else expiry
+
+
+def source_key(url: str) -> str:
+    """key ของไฟล์ต้นทาง: ไฟล์แนบ Discord ใช้แค่ path (ลายเซ็น/ขนาด/รูปแบบเปลี่ยนได้แต่เป็นไฟล์เดิม)"""
+    parts = urlsplit(url)
+    if parts.hostname in DISCORD_CDN_HOSTS:
+        return f"discord:{parts.path}"
+    return url
+
+
+class MenuImageCache:
+    """
+    download(url) -> (bytes, content_type) : ดาวน์โหลดรูป (raise ถ้าไม่สำเร็จ)
+    upload(path, filename) -> url          : อัปโหลดไฟล์เป็นไฟล์แนบ คืน URL (ไม่บังคับ)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        download: Callable[[str], Awaitable[tuple[bytes, str]]],
+        upload: Optional[Callable[[str, str], Awaitable[str]]] = None,
+        expiry_margin: float = 600,
+        retry_interval: float = 300,
+    ):
+        self.directory = directory
+        self.download = download
+        self.upload = upload
+        self.expiry_margin = expiry_margin
+        self.retry_interval = retry_interval
+        # { source key: {"file": ชื่อไฟล์, "sha256": ..., "fetched_at": ...} }
+        self._sources: dict[str, dict] = {}
+        # { sha256: URL ไฟล์แนบที่อัปโหลดไว้ }
+        self._uploads: dict[str, str] = {}
+        self._inflight: dict[str, asyncio.Future] = {}      # ดาวน์โหลดที่กำลังทำ { source key: future }
+        self._uploading: dict[str, asyncio.Future] = {}     # อัปโหลดที่กำลังทำ { sha256: future }
+        self._background: set[asyncio.Task] = set()
+        # ดาวน์โหลดไม่สำเร็จ (เช่นลิงก์หมดอายุไปแล้ว) ไม่ลองซ้ำก่อน retry_interval { source key: เวลา }
+        self._failed: dict[str, float] = {}
+        self._loaded = False
+        self.downloads = 0
+        self.disk_hits = 0
+        self.uploads = 0
+        self.failures = 0
+
+    def is_expired(self, url: str) -> bool:
+        """ลิงก์หมดอายุแล้ว หรือจะหมดภายใน expiry_margin วินาที"""
+        expiry = expires_at(url)
+        return expiry is not None and expiry - self.expiry_margin <= time.time()
+
+    async def load(self) -> int:
+        """โหลด index จากไฟล์ (ข้ามรายการที่ไฟล์รูปหายไปแล้ว) คืนจำนวนรูปที่มีในเครื่อง"""
+        data = await asyncio.to_thread(self._read_index)
+        self._sources = {
+            key: entry for key, entry in data.get("sources", {}).items()
+            if os.path.exists(os.path.join(self.directory, entry.get("file", "")))
+        }
+        self._uploads = dict(data.get("uploads", {}))
+        self._loaded = True
+        return len(self._sources)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """path ของรูปในเครื่อง (ดาวน์โหลดถ้ายังไม่มี) หรือ None ถ้าดาวน์โหลดไม่ได้"""
+        if not self._loaded:
+            await self.load()
+        key = source_key(url)
+        entry = self._sources.get(key)
+        if entry is not None:
+            path = os.path.join(self.directory, entry["file"])
+            if os.path.exists(path):
+                self.disk_hits += 1
+                return path
+            del self._sources[key]
+
+        failed_at = self._failed.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_interval:
+            return None
+
+        # หลายช่องขอรูปเดียวกันพร้อมกัน -> ดาวน์โหลดครั้งเดียว
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._download(key, url))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def resolve(self, url: str) -> tuple[Optional[str], Optional[str]]:
+        """
+        คืน (image_url, attach_path) สำหรับแสดงรูปเมนู
+          image_url   ใช้กับ embed.set_image ได้เลย
+          attach_path ต้องแนบไฟล์นี้ไปกับข้อความ (แล้วใช้ attachment://<ชื่อไฟล์>)
+        ทั้งคู่เป็น None ถ้าไม่มีรูปที่ใช้ได้
+        """
+        if not self.is_expired(url):
+            # ดาวน์โหลดเก็บไว้ก่อน เผื่อลิงก์หมดอายุภายหลัง (ไม่ต้องรอ)
+            key = source_key(url)
+            if key not in self._sources and key not in self._inflight:
+                task = asyncio.create_task(self._quiet_fetch(url))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return url, None
+
+        path = await self.fetch(url)
+        if path is None:
+            return None, None
+
+        sha256 = self._sources[source_key(url)]["sha256"]
+        uploaded = self._uploads.get(sha256)
+        if uploaded is not None and not self.is_expired(uploaded):
+            return uploaded, None
+        if self.upload is None:
+            return None, path
+
+        future = self._uploading.get(sha256)
+        if future is None:
+            future = self._uploading[sha256] = asyncio.ensure_future(self._upload(sha256, path))
+            future.add_done_callback(lambda _: self._uploading.pop(sha256, None))
+        uploaded = await asyncio.shield(future)
+        return (uploaded, None) if uploaded else (None, path)
+
+    async def remember_upload(self, url: str, uploaded: str):
+        """
+        จำ URL ไฟล์แนบ `uploaded` ที่ผู้เรียกส่งรูปของ `url` ไปเอง (กรณี resolve คืน attach_path)
+        resolve ครั้งถัดไปจะใช้ URL นี้แทนการแนบไฟล์ซ้ำ จนกว่าจะใกล้หมดอายุ
+        """
+        entry = self._sources.get(source_key(url))
+        if entry is None or self._uploads.get(entry["sha256"]) == uploaded:
+            return
+        self._uploads[entry["sha256"]] = uploaded
+        await self._save()
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "images": len(self._sources),
+            "downloads": self.downloads,
+            "disk_hits": self.disk_hits,
+            "uploads": self.uploads,
+            "failures": self.failures,
+        }
+
+    async def _quiet_fetch(self, url: str):
+        try:
+            await self.fetch(url)
+        except Exception as e:
+            log.warning("ดาวน์โหลดรูปเมนูล่วงหน้าไม่สำเร็จ: %s", e)
+
+    async def _download(self, key: str, url: str) -> Optional[str]:
+        try:
+            body, content_type = await self.download(url)
+        except Exception as e:
+            self.failures += 1
+            self._failed[key] = time.monotonic()
+            log.warning("ดาวน์โหลดรูปเมนูไม่สำเร็จ (%s): %s", key, e)
+            return None
+        self._failed.pop(key, None)
+        self.downloads += 1
+        sha256, filename = await asyncio.to_thread(self._store, body, content_type)
+        self._sources[key] = {"file": filename, "sha256": sha256, "fetched_at": time.time()}
+        await self._save()
+        log.info("เก็บรูปเมนู %s เป็น %s (%d KB)", key, filename, len(body) // 1024)
+        return os.path.join(self.directory, filename)
+
+    async def _upload(self, sha256: str, path: str) -> Optional[str]:
+        try:
+            url = await self.upload(path, os.path.basename(path))
+        except Exception as e:
+            self.failures += 1
+            log.warning("อัปโหลดรูปเมนู %s ไม่สำเร็จ: %s", os.path.basename(path), e)
+            return None
+        self.uploads += 1
+        self._uploads[sha256] = url
+        await self._save()
+        return url
+
+    def _store(self, body: bytes, content_type: str) -> tuple[str, str]:
+        sha256 = hashlib.sha256(body).hexdigest()
+        extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".png"
+        filename = f"{sha256}{extension}"
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return sha256, filename
+
+    async def _save(self):
+        data = {"sources": dict(self._sources), "uploads": dict(self._uploads)}
+        try:
+            merged = await asyncio.to_thread(self._write_index, data)
+        except OSError as e:
+            log.error("บันทึก index รูปเมนูไม่สำเร็จ: %s", e)
+            return
+        # รับรายการที่โปรเซสอื่นบันทึกไว้ (เช่น URL ที่อัปโหลดแล้ว) มาใช้ด้วย
+        for key, entry in merged["sources"].items():
+            self._sources.setdefault(key, entry)
+        for sha256, url in merged["uploads"].items():
+            if sha256 not in self._uploads or _expiry_order(url) > _expiry_order(self._uploads[sha256]):
+                self._uploads[sha256] = url
+
+    def _read_index(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, data: dict) -> dict:
+        """รวม data กับ index ในไฟล์แล้วเขียนทับ (ภายใต้ lock) คืน index ที่รวมแล้ว"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self._index_lock():
+            merged = merge_index(self._read_index(), data)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        return merged
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """lock ข้ามโปรเซสของ index.json (ไฟล์ lock แยก เพราะ index.json ถูก os.replace ทุกครั้ง)"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, INDEX_LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,181 @@
+"""
+เก็บสถิติการทำงานของบอท (เวลาตอบคำสั่ง, latency ของ backend, cache hit, event-loop lag)
+แล้วแสดงผลเป็น text แบบ Prometheus (ผ่าน cogs/stats.py)
+
+เปิดใช้ด้วย environment variable BOT_METRICS=1
+ถ้าปิดอยู่ ทุกฟังก์ชันจะ return ทันที (timer() คืน context manager เปล่าที่ใช้ร่วมกัน) จึงแทบไม่มี overhead
+"""
+import bisect
+import contextlib
+import os
+import time
+from typing import Callable, Iterable
+
+# ขอบบนของแต่ละ bucket (มิลลิวินาที)
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+Labels = tuple  # (("command", "!menu"), ...)
+# collector() -> [(ชื่อ metric, {label: value}, ค่า), ...] สำหรับค่าที่อ่านสด ๆ ตอน render (gauge)
+Collector = Callable[[], Iterable[tuple[str, dict, float]]]
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.total += value_ms
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        """บวกค่าของ histogram อื่นเข้ามา (ใช้ bucket ชุดเดียวกันเสมอ)"""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """ค่าประมาณของ quantile (ขอบบนของ bucket ที่ครอบคลุม)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_inflight", "_start")
+
+    def __init__(self, metrics, name: str, labels: Labels, inflight: str):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+        self._inflight = inflight
+
+    def __enter__(self):
+        if self._inflight:
+            self._metrics.add(self._inflight, 1, self._labels)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, (time.perf_counter() - self._start) * 1000, self._labels)
+        if self._inflight:
+            self._metrics.add(self._inflight, -1, self._labels)
+        return False
+
+
+_NOOP = contextlib.nullcontext()
+
+
+class Metrics:
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self._collectors: dict[str, Collector] = {}
+
+    # -----------------------------------------------------------------
+    # บันทึกค่า
+    # -----------------------------------------------------------------
+    def observe(self, name: str, value_ms: float, labels: Labels = ()):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = self.histograms[(name, labels)] = Histogram()
+        histogram.observe(value_ms)
+
+    def inc(self, name: str, amount: float = 1, labels: Labels = ()):
+        if not self.enabled:
+            return
+        self.counters[(name, labels)] = self.counters.get((name, labels), 0) + amount
+
+    def add(self, name: str, amount: float, labels: Labels = ()):
+        """เพิ่ม/ลดค่า gauge (เช่นจำนวนที่กำลังทำงานอยู่)"""
+        if not self.enabled:
+            return
+        self.gauges[(name, labels)] = self.gauges.get((name, labels), 0) + amount
+
+    def set(self, name: str, value: float, labels: Labels = ()):
+        if not self.enabled:
+            return
+        self.gauges[(name, labels)] = value
+
+    def timer(self, name: str, labels: Labels = (), inflight: str = None):
+        """with metrics.timer("...", (("command", "!menu"),), inflight="..."): จับเวลาเป็น ms"""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels, inflight)
+
+    def register_collector(self, key: str, collector: Collector):
+        self._collectors[key] = collector
+
+    def unregister_collector(self, key: str):
+        self._collectors.pop(key, None)
+
+    def collect(self) -> list[tuple[str, dict, float]]:
+        samples = []
+        for collector in list(self._collectors.values()):
+            try:
+                samples.extend(collector())
+            except Exception:
+                pass
+        return samples
+
+    # -----------------------------------------------------------------
+    # แสดงผล
+    # -----------------------------------------------------------------
+    def render_prometheus(self) -> str:
+        lines = []
+        typed = set()
+
+        def header(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.total:.3f}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        for name, labels, value in self.collect():
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(tuple(labels.items()))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ตัวเก็บสถิติที่ใช้ร่วมกันทั้งบอท
+metrics = Metrics(enabled=os.getenv("BOT_METRICS", "0") == "1")
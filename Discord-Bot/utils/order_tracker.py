@@ -0,0 +1,184 @@
+"""
+ติดตามสถานะออเดอร์แล้วแจ้งลูกค้าเมื่อเปลี่ยน (ชำระเงินแล้ว / อาหารเสร็จแล้ว)
+
+poller ตัวเดียวดึง GET /store/orders ครั้งเดียวต่อร้านต่อรอบ (เฉพาะร้านที่มีออเดอร์ค้างอยู่)
+แล้วเทียบกับสถานะล่าสุดที่จำไว้ จำนวน request ต่อรอบจึงเท่ากับจำนวนร้าน ไม่ขึ้นกับจำนวนออเดอร์/ลูกค้า
+
+ช่วงเวลาระหว่างรอบปรับเองได้: มีการเปลี่ยนแปลงหรือมีออเดอร์ใหม่ -> ถี่ขึ้น (min_interval),
+ไม่มีอะไรเปลี่ยน -> ห่างออกทีละ 2 เท่าจนถึง max_interval, ไม่มีออเดอร์ค้าง -> หยุดรอ
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+PAID = "paid"
+DONE = "done"
+
+
+class TrackedOrder:
+    __slots__ = ("order_id", "store_id", "channel_id", "user_id", "food_name", "paid", "done", "created_at")
+
+    def __init__(self, order_id: int, store_id: int, channel_id: int, user_id: int, food_name: str):
+        self.order_id = order_id
+        self.store_id = store_id
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.food_name = food_name
+        self.paid = False
+        self.done = False
+        self.created_at = time.monotonic()
+
+
+# fetch(store_id) -> รายการออเดอร์ของร้าน (list ของ dict จาก API) หรือ None ถ้าดึงไม่ได้
+Fetcher = Callable[[int], Awaitable[Optional[list]]]
+# notify(channel_id, [(ออเดอร์, PAID หรือ DONE), ...])
+Notifier = Callable[[int, list], Awaitable[None]]
+
+
+class OrderTracker:
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        notify: Notifier,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        max_age: float = 3 * 60 * 60,
+        concurrency: int = 4,
+    ):
+        self._fetch = fetch
+        self._notify = notify
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_age = max_age
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        # { store_id: { order_id: TrackedOrder } }
+        self._orders: dict[int, dict[int, TrackedOrder]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.interval = min_interval
+
+        self.polls = 0
+        self.requests = 0
+        self.notifications = 0
+
+    @property
+    def outstanding(self) -> int:
+        return sum(len(orders) for orders in self._orders.values())
+
+    def track(self, order_id: int, store_id: int, channel_id: int, user_id: int, food_name: str):
+        self._orders.setdefault(store_id, {})[order_id] = TrackedOrder(order_id, store_id, channel_id, user_id, food_name)
+        # ออเดอร์ใหม่: กลับไป poll ถี่ ๆ
+        self.interval = self.min_interval
+        self._wakeup.set()
+
+    def forget_channel(self, channel_id: int):
+        for store_id in list(self._orders):
+            orders = self._orders[store_id]
+            for order_id in [o.order_id for o in orders.values() if o.channel_id == channel_id]:
+                del orders[order_id]
+            if not orders:
+                del self._orders[store_id]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "outstanding": self.outstanding,
+            "stores": len(self._orders),
+            "interval": self.interval,
+            "polls": self.polls,
+            "requests": self.requests,
+            "notifications": self.notifications,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._orders:
+                # ไม่มีออเดอร์ค้าง: หยุดรอจนกว่าจะมีออเดอร์ใหม่
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # รอ interval ก่อน poll; ถ้ามีออเดอร์ใหม่ระหว่างรอ (interval ถูกลดลง) ให้ร่นเวลาเข้ามา
+            deadline = loop.time() + self.interval
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+                deadline = min(deadline, loop.time() + self.interval)
+
+            try:
+                changed = await self.poll_once()
+            except Exception as e:
+                log.error("ตรวจสถานะออเดอร์ไม่สำเร็จ: %s", e)
+                changed = False
+
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 2)
+
+    async def poll_once(self) -> bool:
+        """ดึงสถานะ 1 รอบ (1 request ต่อร้าน) แจ้งเตือนสิ่งที่เปลี่ยน คืน True ถ้ามีการเปลี่ยนแปลง"""
+        self.polls += 1
+        self._drop_expired()
+        store_ids = list(self._orders)
+        snapshots = await asyncio.gather(*(self._fetch_store(store_id) for store_id in store_ids))
+
+        changes: dict[int, list] = {}
+        for store_id, remote_orders in zip(store_ids, snapshots):
+            tracked = self._orders.get(store_id)
+            if remote_orders is None or not tracked:
+                continue
+            for remote in remote_orders:
+                order = tracked.get(remote.get("order_id"))
+                if order is None:
+                    continue
+                if remote.get("done") and not order.done:
+                    # เสร็จแล้วแจ้งแค่ "เสร็จ" ไม่ต้องแจ้ง "ชำระเงิน" ซ้ำ
+                    order.paid = order.done = True
+                    changes.setdefault(order.channel_id, []).append((order, DONE))
+                    del tracked[order.order_id]
+                elif remote.get("paid") and not order.paid:
+                    order.paid = True
+                    changes.setdefault(order.channel_id, []).append((order, PAID))
+            if not tracked:
+                self._orders.pop(store_id, None)
+
+        for channel_id, channel_changes in changes.items():
+            self.notifications += 1
+            try:
+                await self._notify(channel_id, channel_changes)
+            except Exception as e:
+                log.error("แจ้งเตือนช่อง %s ไม่สำเร็จ: %s", channel_id, e)
+        return bool(changes)
+
+    async def _fetch_store(self, store_id: int) -> Optional[list]:
+        async with self._semaphore:
+            self.requests += 1
+            return await self._fetch(store_id)
+
+    def _drop_expired(self):
+        cutoff = time.monotonic() - self.max_age
+        for store_id in list(self._orders):
+            orders = self._orders[store_id]
+            for order_id in [o.order_id for o in orders.values() if o.created_at < cutoff]:
+                del orders[order_id]
+            if not orders:
+                del self._orders[store_id]
@@ -0,0 +1,212 @@
+"""
+รายชื่อนักศึกษาสำหรับ /verify (แทน dict TMPDATA ที่เขียนไว้ในโค้ด)
+
+- ต้นทางเป็นไฟล์ CSV (student_id,name) ที่อัปเดตทุกเทอม
+- import ทั้งไฟล์ลง SQLite (student_id เป็น PRIMARY KEY) ในไฟล์ชั่วคราวแล้ว os.replace ทับของเดิม
+  คนที่กำลังค้นหาอยู่จะเห็นรายชื่อชุดเก่าหรือชุดใหม่ทั้งชุดเท่านั้น ไม่มีครึ่ง ๆ กลาง ๆ
+- ค้นหาผ่าน LRU ในหน่วยความจำก่อน ถ้าไม่เจอค่อยถาม SQLite ใน thread (event loop ไม่ค้าง)
+- ตรวจเวลาแก้ไขของ CSV เป็นระยะ ถ้าเปลี่ยนก็ import ใหม่เอง ไม่ต้องรีสตาร์ทบอท
+"""
+import asyncio
+import csv
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def import_csv(csv_path: str, db_path: str) -> int:
+    """อ่าน CSV ทั้งไฟล์แล้วสร้างฐานข้อมูลใหม่แทนของเดิมแบบ atomic คืนจำนวนรายชื่อ"""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # ชื่อไฟล์ชั่วคราวแยกตาม pid: หลายโปรเซส (launcher.py) import พร้อมกันได้ไม่ทับกัน
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.execute("CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID")
+        with open(csv_path, newline="", encoding="utf-8-sig") as f, db:
+            db.executemany("INSERT OR REPLACE INTO students (student_id, name) VALUES (?, ?)", _read_rows(f))
+        count = db.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    finally:
+        db.close()
+
+    os.replace(tmp_path, db_path)
+    return count
+
+
+def _read_rows(f):
+    for row in csv.reader(f):
+        if len(row) < 2:
+            continue
+        student_id, name = row[0].strip(), row[1].strip()
+        # ข้ามบรรทัดหัวตาราง / บรรทัดที่รหัสไม่ใช่ตัวเลข
+        if not student_id.isdigit() or not name:
+            continue
+        yield student_id, name
+
+
+class Roster:
+
+    def __init__(self, db_path: str, csv_path: Optional[str] = None, cache_size: int = 4096, reload_interval: float = 60.0):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+
+        self._cache: OrderedDict[str, Optional[str]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._db_lock = threading.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._csv_mtime: Optional[float] = None
+        self._generation = 0
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    # -----------------------------------------------------------------
+    # ค้นหา
+    # -----------------------------------------------------------------
+    async def lookup(self, student_id: str) -> Optional[str]:
+        """คืนชื่อของรหัสนักศึกษา หรือ None ถ้าไม่มีในรายชื่อ"""
+        name = self._cache.get(student_id, _MISSING)
+        if name is not _MISSING:
+            self.hits += 1
+            self._cache.move_to_end(student_id)
+            return name
+
+        self.misses += 1
+        # รหัสเดียวกันที่ถามพร้อมกันหลายคน ถาม SQLite แค่ครั้งเดียว
+        task = self._inflight.get(student_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(student_id))
+            self._inflight[student_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(student_id, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, student_id: str) -> Optional[str]:
+        generation = self._generation
+        name = await asyncio.to_thread(self._query, student_id)
+        # ระหว่างรอมีการ reload: อย่าเอาค่าจากรายชื่อชุดเก่ามาใส่ cache
+        if generation == self._generation:
+            self._cache[student_id] = name
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return name
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": self.size,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "reloads": self.reloads,
+        }
+
+    # -----------------------------------------------------------------
+    # โหลด / reload
+    # -----------------------------------------------------------------
+    async def load(self) -> int:
+        """เปิดฐานข้อมูล (import จาก CSV ก่อนถ้า CSV ใหม่กว่า) คืนจำนวนรายชื่อ"""
+        if self.csv_path and self._csv_changed(since=self._db_mtime()):
+            return await self.reload()
+        if self.csv_path:
+            # ฐานข้อมูลใหม่กว่า CSV อยู่แล้ว: จำ mtime ไว้ ไม่งั้น _watch_loop จะ import ซ้ำรอบแรก
+            try:
+                self._csv_mtime = os.path.getmtime(self.csv_path)
+            except OSError:
+                pass
+        await self._open()
+        return self.size
+
+    async def reload(self) -> int:
+        """import CSV ใหม่ทั้งไฟล์แล้วสลับไปใช้ชุดใหม่ทันที"""
+        async with self._reload_lock:
+            mtime = os.path.getmtime(self.csv_path)
+            count = await asyncio.to_thread(import_csv, self.csv_path, self.db_path)
+            await self._open()
+            self._csv_mtime = mtime
+            self.reloads += 1
+            log.info("โหลดรายชื่อนักศึกษา %d คน จาก %s", count, self.csv_path)
+            return count
+
+    def start(self):
+        if self.csv_path and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+
+    async def close(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    async def _watch_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self._csv_changed(since=self._csv_mtime):
+                    await self.reload()
+            except Exception as e:
+                log.error("reload รายชื่อนักศึกษาไม่สำเร็จ (ใช้ชุดเดิมต่อ): %s", e)
+
+    def _csv_changed(self, since: Optional[float]) -> bool:
+        try:
+            mtime = os.path.getmtime(self.csv_path)
+        except OSError:
+            return False
+        return since is None or mtime > since
+
+    def _db_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.db_path)
+        except OSError:
+            return None
+
+    async def _open(self):
+        """เปิดฐานข้อมูลชุดล่าสุดแล้วสลับมาใช้ (เรียกบน event loop, ส่วนที่ช้าทำใน thread)"""
+        db, size = await asyncio.to_thread(self._connect)
+        with self._db_lock:
+            old, self._db = self._db, db
+        self._generation += 1
+        self._cache.clear()
+        self.size = size
+        if old is not None:
+            old.close()
+
+    # -----------------------------------------------------------------
+    # SQLite (เรียกใน thread เท่านั้น)
+    # -----------------------------------------------------------------
+    def _connect(self):
+        if not os.path.exists(self.db_path):
+            return None, 0
+        db = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        db.execute("PRAGMA mmap_size = 67108864")
+        return db, db.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def _query(self, student_id: str) -> Optional[str]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT name FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        return row[0] if row else None
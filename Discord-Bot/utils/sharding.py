@@ -0,0 +1,74 @@
+"""
+ตั้งค่า shard ของบอทจาก environment (ใช้ร่วมกันระหว่าง bot.py และ launcher.py)
+
+  (ไม่ตั้งอะไร)                        บอทธรรมดา 1 โปรเซส 1 connection
+  BOT_AUTO_SHARD=1                     AutoShardedBot ในโปรเซสเดียว ให้ Discord บอกจำนวน shard
+  BOT_SHARD_COUNT=4 BOT_SHARD_IDS=0,1  โปรเซสนี้ถือ shard 0 และ 1 จากทั้งหมด 4 (launcher.py ตั้งให้)
+
+guild หนึ่งอยู่บน shard เดียวเสมอ: shard_id = (guild_id >> 22) % shard_count
+"""
+import os
+from typing import Optional
+
+
+class ShardConfig:
+    __slots__ = ("sharded", "shard_count", "shard_ids")
+
+    def __init__(self, sharded: bool = False, shard_count: Optional[int] = None, shard_ids: Optional[list[int]] = None):
+        self.sharded = sharded
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+    @property
+    def partial(self) -> bool:
+        """โปรเซสนี้ถือแค่บาง shard (มีโปรเซสอื่นถือ shard ที่เหลือ)"""
+        return self.shard_ids is not None and self.shard_count is not None and len(self.shard_ids) < self.shard_count
+
+    def __repr__(self) -> str:
+        if not self.sharded:
+            return "ShardConfig(single)"
+        return f"ShardConfig(count={self.shard_count or 'auto'}, ids={self.shard_ids or 'all'})"
+
+
+def shard_config_from_env(env=os.environ) -> ShardConfig:
+    count = env.get("BOT_SHARD_COUNT")
+    if count:
+        ids = env.get("BOT_SHARD_IDS")
+        shard_ids = sorted({int(part) for part in ids.split(",") if part.strip()}) if ids else None
+        shard_count = int(count)
+        if shard_ids and max(shard_ids) >= shard_count:
+            raise ValueError(f"BOT_SHARD_IDS {shard_ids} out of range for BOT_SHARD_COUNT={shard_count}")
+        return ShardConfig(True, shard_count, shard_ids)
+    if env.get("BOT_AUTO_SHARD", "0") == "1":
+        return ShardConfig(True)
+    return ShardConfig()
+
+
+def split_shards(shard_count: int, processes: int) -> list[list[int]]:
+    """แบ่ง shard ให้แต่ละโปรเซสเท่า ๆ กัน เช่น (5, 2) -> [[0, 2, 4], [1, 3]]"""
+    processes = max(1, min(processes, shard_count))
+    return [list(range(start, shard_count, processes)) for start in range(processes)]
+
+
+def guild_shard_id(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def sees_all_guilds(bot) -> bool:
+    """
+    บอทตัวนี้เห็นทุก guild ไหม (ถ้าไม่ใช่ ช่องที่ get_channel ไม่เจออาจอยู่กับโปรเซสอื่น
+    ห้ามถือว่าช่องนั้นถูกลบไปแล้ว)
+    """
+    shard_ids = getattr(bot, "shard_ids", None)
+    shard_count = getattr(bot, "shard_count", None)
+    if shard_ids is None or shard_count is None:
+        return True
+    return len(set(shard_ids)) >= shard_count
+
+
+def owns_shard_zero(bot) -> bool:
+    """งานที่ควรทำแค่ครั้งเดียวทั้งระบบ (เช่น sync slash command) ให้โปรเซสที่ถือ shard 0 ทำ"""
+    shard_ids = getattr(bot, "shard_ids", None)
+    if shard_ids is None:
+        return getattr(bot, "shard_id", None) in (None, 0)
+    return 0 in shard_ids
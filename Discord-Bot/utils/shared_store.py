@@ -0,0 +1,103 @@
+"""
+cache ที่หลายโปรเซสของบอทใช้ร่วมกัน (ไฟล์ SQLite ในเครื่อง)
+
+ใช้เป็นชั้นที่ 2 หลัง TTLCache ของแต่ละโปรเซสตอนรันแบบหลายโปรเซส (launcher.py):
+โปรเซสแรกที่ cache หมดอายุเป็นคนยิง backend แล้วเขียนผลลงที่นี่ โปรเซสอื่นอ่านต่อได้เลย
+จำนวน request ไป backend จึงไม่คูณตามจำนวนโปรเซส
+
+ค่าเก็บเป็น JSON (key ของ dict จะกลายเป็น str ผู้เรียกต้องแปลงกลับเอง)
+ทุกการอ่าน/เขียนทำใน thread และใช้ WAL เพื่อให้หลายโปรเซสอ่านพร้อมกับที่อีกโปรเซสเขียนได้
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Optional
+
+BUSY_TIMEOUT_MS = 5000
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """เปิด SQLite ที่แชร์ระหว่างโปรเซส (WAL + รอ lock แทนที่จะ error ทันที)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return db
+
+
+class SharedStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, namespace: str, key, max_age: float) -> Optional[Any]:
+        """คืนค่าที่ถูกเขียนไว้ไม่เกิน max_age วินาที หรือ None"""
+        row = await asyncio.to_thread(self._read, namespace, str(key), time.time() - max_age)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row)
+
+    async def put(self, namespace: str, key, value: Any):
+        await asyncio.to_thread(self._write, namespace, str(key), json.dumps(value, ensure_ascii=False))
+
+    async def clear(self, namespace: Optional[str] = None):
+        await asyncio.to_thread(self._delete, namespace)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _connect(self) -> sqlite3.Connection:
+        db = connect(self.path)
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_cache (
+                namespace TEXT NOT NULL,
+                key       TEXT NOT NULL,
+                value     TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        return db
+
+    def _read(self, namespace: str, key: str, min_stored_at: float) -> Optional[str]:
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT value FROM shared_cache WHERE namespace = ? AND key = ? AND stored_at >= ?",
+                (namespace, key, min_stored_at),
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    def _write(self, namespace: str, key: str, value: str):
+        db = self._connect()
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO shared_cache (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, value, time.time()),
+                )
+        finally:
+            db.close()
+
+    def _delete(self, namespace: Optional[str]):
+        db = self._connect()
+        try:
+            with db:
+                if namespace is None:
+                    db.execute("DELETE FROM shared_cache")
+                else:
+                    db.execute("DELETE FROM shared_cache WHERE namespace = ?", (namespace,))
+        finally:
+            db.close()
@@ -0,0 +1,161 @@
+"""
+คิวส่งงานไป API แบบ async (ใช้กับ POST /orders/add)
+
+- worker จำนวนคงที่ดึงงานจากคิวที่จำกัดความยาว (เต็มแล้วรับงานใหม่ไม่ได้ -> QueueFull)
+- ถ้าล้มเหลวแบบลองใหม่ได้ (เชื่อมต่อไม่ได้, timeout, 5xx, 429) จะลองใหม่ด้วย
+  exponential backoff + jitter จนครบ max_attempts
+- retry_delay() (ไม่บังคับ) บอกเวลาขั้นต่ำที่ต้องรอก่อนลองครั้งถัดไป เช่นจนกว่า circuit breaker
+  จะเข้า half-open งานจึงรอ backend กลับมาแทนที่จะใช้ครั้งที่ลองหมดไปกับการถูกปฏิเสธทันที
+- งานทุกชิ้นมี idempotency key; ส่ง key เดิมซ้ำระหว่างที่งานยังไม่เสร็จจะได้ผลลัพธ์ชุดเดียวกัน
+"""
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+# send(payload, idempotency_key) -> (สำเร็จไหม, ผลลัพธ์หรือข้อความ error, ลองใหม่ได้ไหม)
+Sender = Callable[[dict, str], Awaitable[tuple[bool, Any, bool]]]
+# on_retry(ครั้งที่ล้มเหลว, ข้อความ error)
+RetryCallback = Callable[[int, Any], Awaitable[None]]
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SubmissionJob:
+    __slots__ = ("payload", "key", "future", "attempts", "on_retry")
+
+    def __init__(self, payload: dict, key: str, future: asyncio.Future, on_retry: Optional[RetryCallback]):
+        self.payload = payload
+        self.key = key
+        self.future = future
+        self.attempts = 0
+        self.on_retry = on_retry
+
+
+class SubmissionQueue:
+
+    def __init__(
+        self,
+        send: Sender,
+        workers: int = 4,
+        max_depth: int = 200,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retry_delay: Optional[Callable[[], float]] = None,
+    ):
+        self._send = send
+        self.retry_delay = retry_delay
+        self.worker_count = workers
+        self.max_depth = max_depth
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._workers: list[asyncio.Task] = []
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def free_slots(self) -> int:
+        return self.max_depth - self._queue.qsize()
+
+    def start(self):
+        for _ in range(self.worker_count - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result((False, "ระบบปิดตัวก่อนส่งออเดอร์สำเร็จ"))
+        self._pending.clear()
+
+    def submit(self, payload: dict, key: str, on_retry: Optional[RetryCallback] = None) -> asyncio.Future:
+        """
+        ใส่งานลงคิว คืน Future ที่จะได้ผลเป็น (สำเร็จไหม, ผลลัพธ์หรือข้อความ error)
+        ถ้ามีงาน key เดียวกันค้างอยู่ จะคืน Future ตัวเดิมแทนการส่งซ้ำ
+        """
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(SubmissionJob(payload, key, future, on_retry))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"คิวเต็ม ({self.max_depth} งาน)") from None
+
+        self.submitted += 1
+        self._pending[key] = future
+        future.add_done_callback(lambda _, k=key: self._pending.pop(k, None))
+        return future
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
+
+    def backoff_delay(self, attempt: int) -> float:
+        """exponential backoff แบบ full jitter: สุ่มระหว่าง 0 ถึง base * 2^(attempt-1)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self.in_flight += 1
+            try:
+                ok, result = await self._process(job)
+            except Exception as e:
+                ok, result = False, f"เกิดข้อผิดพลาดที่ไม่คาดคิด: {e}"
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+            if ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            if not job.future.done():
+                job.future.set_result((ok, result))
+
+    async def _process(self, job: SubmissionJob) -> tuple[bool, Any]:
+        while True:
+            job.attempts += 1
+            ok, result, retryable = await self._send(job.payload, job.key)
+            if ok or not retryable or job.attempts >= self.max_attempts:
+                return ok, result
+
+            self.retries += 1
+            if job.on_retry is not None:
+                try:
+                    await job.on_retry(job.attempts, result)
+                except Exception:
+                    pass
+            delay = self.backoff_delay(job.attempts)
+            if self.retry_delay is not None:
+                delay += self.retry_delay()
+            await asyncio.sleep(delay)
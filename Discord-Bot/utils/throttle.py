@@ -0,0 +1,113 @@
+"""
+เครื่องมือกันคำสั่งซ้ำ/สแปมในช่องทิกเก็ต
+
+- KeyedLocks  : lock แยกตาม key (เช่นต่อช่อง) คำสั่งในช่องเดียวกันทำทีละคำสั่ง ช่องอื่นไม่ต้องรอ
+                lock ที่ไม่มีใครใช้แล้วถูกลบทิ้งทันที (จำนวน lock = จำนวนช่องที่กำลังทำงานอยู่)
+- DedupWindow : จำ key ที่เพิ่งเห็นไว้ `window` วินาที (เช่น (ช่อง, คนสั่ง, เมนู)) ใช้ทิ้งคำสั่งที่กดซ้ำโดยไม่ตั้งใจ
+- RateLimiter : token bucket ต่อ key (เช่นต่อผู้ใช้) เก็บ token ได้สูงสุด `burst` เติม `rate` token/วินาที
+ทั้งหมดใช้ใน event loop เดียว (ไม่ thread-safe) และจำกัดจำนวน key ที่จำไว้
+"""
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class KeyedLocks:
+
+    def __init__(self):
+        # { key: [lock, จำนวนที่ถือ/รอ lock นี้อยู่] }
+        self._locks: dict[Hashable, list] = {}
+
+    @contextlib.asynccontextmanager
+    async def lock(self, key: Hashable):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def locked(self, key: Hashable) -> bool:
+        entry = self._locks.get(key)
+        return entry is not None and entry[0].locked()
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class DedupWindow:
+
+    def __init__(self, window: float, max_size: int = 10000):
+        self.window = window
+        self.max_size = max_size
+        self._seen: OrderedDict[Hashable, float] = OrderedDict()   # key -> เวลาที่เห็น (เรียงเก่า -> ใหม่)
+        self.duplicates = 0
+
+    def seen(self, key: Hashable) -> bool:
+        """True ถ้าเห็น key นี้ภายใน window วินาทีที่ผ่านมา (ไม่ต่ออายุ) ไม่เช่นนั้นจำไว้แล้วคืน False"""
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+        self._seen[key] = now
+        if len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return False
+
+    def retry_after(self, key: Hashable) -> float:
+        """(วินาที) อีกนานเท่าไร key นี้จะพ้น window"""
+        seen_at = self._seen.get(key)
+        if seen_at is None:
+            return 0.0
+        return max(0.0, seen_at + self.window - time.monotonic())
+
+    def forget(self, key: Hashable):
+        self._seen.pop(key, None)
+
+    def _expire(self, now: float):
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.window:
+                break
+            del self._seen[key]
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class RateLimiter:
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()  # key -> (token, เวลาที่อัปเดต)
+        self.throttled = 0
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """ใช้ token `cost` อัน คืน 0 ถ้าผ่าน หรือจำนวนวินาทีที่ต้องรอถ้า token ไม่พอ (ไม่หัก token)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.0
+        else:
+            self.throttled += 1
+            wait = (cost - tokens) / self.rate
+        # bucket ที่เพิ่งใช้อยู่ท้ายสุด เกิน max_keys ลบตัวที่ไม่ได้ใช้นานที่สุด (ส่วนใหญ่ token เต็มแล้ว)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -8,6 +8,8 @@ import (
 	"os"
 	"os/signal"
 	"strconv"
+	"sync"
+	"time"
 
 	"github.com/gorilla/mux"
 	_ "github.com/mattn/go-sqlite3"
@@ -183,6 +185,17 @@ var products []Product
 
 var orders []Order
 
+// Responses keyed by the client's Idempotency-Key header are stored in the
+// order_idempotency table, so a retried POST /orders/add gets the original
+// response back instead of creating a new order, even across restarts. Keys older than
+// orderIdempotencyTTL are deleted when new keys are stored.
+const orderIdempotencyTTL = 24 * time.Hour
+
+var (
+	orderIdempotencyMu sync.Mutex
+	orderIdempotencyDB *sql.DB
+)
+
 var users []User
 
 func initialize() {
@@ -228,6 +241,15 @@ func initialize() {
 		store_id INTEGER NOT NULL,
 		FOREIGN KEY (store_id) REFERENCES stores(store_id)
 	);
+	CREATE TABLE IF NOT EXISTS order_idempotency (
+		idempotency_key TEXT    PRIMARY KEY,
+		order_id        INTEGER NOT NULL,
+		status          INTEGER NOT NULL,
+		response        TEXT    NOT NULL,
+		created_at      INTEGER NOT NULL,
+		FOREIGN KEY (order_id) REFERENCES orders(order_id)
+	);
+	CREATE INDEX IF NOT EXISTS order_idempotency_created_at ON order_idempotency(created_at);
 	`)
 
 	if err != nil {
@@ -297,6 +319,70 @@ func initialize() {
 		}
 		users = append(users, user)
 	}
+
+	orderIdempotencyDB, err = sql.Open("sqlite3", "./data.sqlite")
+	if err != nil {
+		panic(err)
+	}
+}
+
+// lookupOrderIdempotency returns the status and body of the response sent for
+// key, if the key has not expired yet.
+func lookupOrderIdempotency(key string) (int, []byte, bool, error) {
+	var status int
+	var response string
+	cutoff := time.Now().Add(-orderIdempotencyTTL).Unix()
+	err := orderIdempotencyDB.QueryRow(
+		"SELECT status, response FROM order_idempotency WHERE idempotency_key = ? AND created_at > ?", key, cutoff,
+	).Scan(&status, &response)
+	if err == sql.ErrNoRows {
+		return 0, nil, false, nil
+	}
+	if err != nil {
+		return 0, nil, false, err
+	}
+	return status, []byte(response), true, nil
+}
+
+// saveOrderIdempotency writes the order and its key with the response sent for
+// it in one transaction, so a key is never stored for an order that is not in
+// the database, and removes expired keys.
+func saveOrderIdempotency(key string, order Order, status int, response []byte) error {
+	tx, err := orderIdempotencyDB.Begin()
+	if err != nil {
+		return err
+	}
+	defer tx.Rollback()
+
+	paidInt := 0
+	if order.Paid {
+		paidInt = 1
+	}
+	doneInt := 0
+	if order.Done {
+		doneInt = 1
+	}
+	_, err = tx.Exec(
+		"REPLACE INTO orders (order_id, student_id, store_id, product_id, total_price, note, paid, done) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+		order.OrderID, order.StudentID, order.StoreID, order.ProductID, order.TotalPrice, order.Note, paidInt, doneInt,
+	)
+	if err != nil {
+		return err
+	}
+
+	now := time.Now()
+	_, err = tx.Exec("DELETE FROM order_idempotency WHERE created_at <= ?", now.Add(-orderIdempotencyTTL).Unix())
+	if err != nil {
+		return err
+	}
+	_, err = tx.Exec(
+		"INSERT INTO order_idempotency (idempotency_key, order_id, status, response, created_at) VALUES (?, ?, ?, ?, ?)",
+		key, order.OrderID, status, string(response), now.Unix(),
+	)
+	if err != nil {
+		return err
+	}
+	return tx.Commit()
 }
 
 func persist() {
@@ -380,6 +466,13 @@ func jsonResponse(w http.ResponseWriter, status int, data any) {
 	w.Write(json)
 }
 
+// rawJSONResponse writes a response body that is already encoded as JSON.
+func rawJSONResponse(w http.ResponseWriter, status int, body []byte) {
+	w.Header().Set("Content-Type", "application/json")
+	w.WriteHeader(status)
+	w.Write(body)
+}
+
 // --- Store
 func handleStoreCreate(w http.ResponseWriter, r *http.Request) {
 	var createStoreRequest CreateStoreRequest
@@ -545,6 +638,23 @@ func handleAddOrder(w http.ResponseWriter, r *http.Request) {
 		http.Error(w, "Invalid order data", http.StatusBadRequest)
 		return
 	}
+
+	idempotencyKey := r.Header.Get("Idempotency-Key")
+	if idempotencyKey != "" {
+		orderIdempotencyMu.Lock()
+		defer orderIdempotencyMu.Unlock()
+		status, response, ok, err := lookupOrderIdempotency(idempotencyKey)
+		if err != nil {
+			http.Error(w, "Failed to check idempotency key", http.StatusInternalServerError)
+			return
+		}
+		if ok {
+			// Replay the original response byte for byte
+			rawJSONResponse(w, status, response)
+			return
+		}
+	}
+
 	var order Order
 	createOrderRequest.toOrder(&order, len(orders)+1)
 
@@ -568,10 +678,22 @@ func handleAddOrder(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 
-	addOrder(order)
-	jsonResponse(w, http.StatusOK, map[string]any{
+	response, err := json.Marshal(map[string]any{
 		"id": order.OrderID,
 	})
+	if err != nil {
+		http.Error(w, "Internal server error", http.StatusInternalServerError)
+		return
+	}
+	if idempotencyKey != "" {
+		err = saveOrderIdempotency(idempotencyKey, order, http.StatusOK, response)
+		if err != nil {
+			http.Error(w, "Failed to save order", http.StatusInternalServerError)
+			return
+		}
+	}
+	addOrder(order)
+	rawJSONResponse(w, http.StatusOK, response)
 }
 
 func handleUpdateOrder(w http.ResponseWriter, r *http.Request) {
@@ -710,7 +832,7 @@ func middleware(next http.Handler) http.Handler {
 		// CORS headers
 		w.Header().Set("Access-Control-Allow-Origin", "*")
 		w.Header().Set("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS")
-		w.Header().Set("Access-Control-Allow-Headers", "Content-Type, Authorization")
+		w.Header().Set("Access-Control-Allow-Headers", "Content-Type, Authorization, Idempotency-Key")
 
 		// Handle preflight requests
 		if r.Method == "OPTIONS" {